@@ -2,23 +2,35 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import itertools
-from collections import Counter
 from scipy.stats import chisquare
 
+from lotofacil_cache import data_version
+from lotofacil_charts import cached_chart, heatmap_png, pie_chart, series_line_chart
+from lotofacil_cooccurrence import subset_frequency, top_subsets
+from lotofacil_data import read_draws, DEZENAS_COLS
+from lotofacil_store import DrawStore, popcount, PRIME_MASK
+from lotofacil_state import load_state
+from lotofacil_windows import rolling_window_stats
+
 # Configuração da página
 st.set_page_config(page_title="Dashboard Lotofácil", layout="wide")
 
 # 1) Carregar dados
-@st.cache_data
-def load_data(path='lotofacil.csv'):
-    df = pd.read_csv(path)
-    df['Concurso'] = df['Concurso'].astype(int)
-    return df
+# A versão dos dados entra na chave dos loaders: quando o CSV muda, DataFrame,
+# DrawStore e gráficos do cache compartilhado são invalidados juntos
+@st.cache_data(max_entries=1)
+def load_data(path, version):
+    return read_draws(path)
+
+@st.cache_resource(max_entries=1)
+def load_store(path, version):
+    return DrawStore.from_frame(load_data(path, version), DEZENAS_COLS)
 
-df = load_data()
-cols = [f'Dezena{i}' for i in range(1,16)]
+CSV_PATH = 'lotofacil.csv'
+version = data_version(CSV_PATH)
+df = load_data(CSV_PATH, version)
+cols = DEZENAS_COLS
+store = load_store(CSV_PATH, version)
 
 # Sidebar de navegação
 st.sidebar.title("Análises")
@@ -29,85 +41,86 @@ section = st.sidebar.radio("Escolha a seção:", [
 # 2) Frequência de dezenas
 if section == 'Frequência':
     st.title("Frequência de cada dezena")
-    all_nums = df[cols].values.flatten()
-    freq = pd.Series(all_nums).value_counts().sort_index()
+    freq = pd.Series(store.number_counts(), index=range(1, 26))
     st.bar_chart(freq)
     st.dataframe(freq.rename_axis('Número').reset_index(name='Frequência'))
 
 # 3) Análise de primos
 elif section == 'Primos':
     st.title("Análise de Números Primos")
-    primos = {str(n).zfill(2) for n in [2,3,5,7,11,13,17,19,23]}
-    all_nums = df[cols].values.flatten()
-    freq = pd.Series(all_nums).value_counts().sort_index()
-    prime_count = freq[freq.index.isin(primos)].sum()
-    nonprime_count = freq[~freq.index.isin(primos)].sum()
+    primos = [2, 3, 5, 7, 11, 13, 17, 19, 23]
+    prime_count = int(popcount(store.masks & PRIME_MASK).sum())
+    nonprime_count = len(store) * len(cols) - prime_count
     n = prime_count + nonprime_count
     chi2, p = chisquare(f_obs=[prime_count, nonprime_count], f_exp=[n*len(primos)/25, n*(25-len(primos))/25])
     st.markdown(f"**Total de primos:** {prime_count}  ")
     st.markdown(f"**Total de não-primos:** {nonprime_count}  ")
     st.markdown(f"**Qui-quadrado:** {chi2:.2f}, **p-value:** {p:.3f}")
-    labels = ['Primos', 'Não-Primos']
-    fig, ax = plt.subplots()
-    ax.pie([prime_count, nonprime_count], labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')
-    st.pyplot(fig)
+    chart = cached_chart(version, 'pizza_primos', (), lambda: pie_chart(
+        {'Primos': prime_count, 'Não-Primos': nonprime_count}))
+    st.altair_chart(chart, use_container_width=True)
 
 # 4) Análise de atraso
 elif section == 'Atraso':
     st.title("Análise de Atraso (Ciclos)")
-    df_sorted = df.sort_values('Concurso')
-    delays = {}
-    for num in range(1,26):
-        num_str = str(num).zfill(2)
-        mask = df_sorted[cols].eq(num_str).any(axis=1)
-        if mask.any():
-            last_idx = mask[mask].index[-1]
-            pos = df_sorted.index.get_loc(last_idx)
-            delay = len(df_sorted) - 1 - pos
-        else:
-            delay = len(df_sorted)
-        delays[num] = delay
-    delay_series = pd.Series(delays).sort_values(ascending=False)
+    last_seen = store.last_seen()
+    delays = np.where(last_seen >= 0, len(store) - 1 - last_seen, len(store))
+    delay_series = pd.Series(delays, index=range(1, 26)).sort_values(ascending=False)
     st.bar_chart(delay_series)
     st.dataframe(delay_series.rename_axis('Número').reset_index(name='Concursos de Atraso'))
+    # Histórico completo de atrasos e ciclos, mantido incrementalmente
+    delays = load_state(df, cols).delays
+    st.subheader("Distribuição dos atrasos por dezena")
+    st.dataframe(delays.gap_statistics().style.format({'AtrasoMédio': '{:.2f}'}))
+    lengths = delays.cycle_lengths()
+    st.subheader("Ciclos (concursos até sair as 25 dezenas)")
+    st.markdown(f"**Ciclos fechados:** {len(lengths)}, **duração média:** {lengths.mean():.2f}, "
+                f"**máxima:** {lengths.max()}  ")
+    st.markdown(f"**Faltam no ciclo atual:** {delays.missing_in_current_cycle()}")
 
 # 5) Média móvel
 elif section == 'Média Móvel':
-    st.title("Média Móvel de uma Dezena")
+    st.title("Média Móvel das Dezenas")
+    window = st.select_slider("Janela (concursos):", options=[10, 20, 50, 100, 200], value=50)
+    stats = rolling_window_stats(store, (10, 20, 50, 100, 200))[window]
     dez = st.selectbox("Selecione a dezena:", list(range(1,26)))
-    dez_str = str(dez).zfill(2)
-    df_sorted = df.sort_values('Concurso')
-    df_sorted[f'Tem_{dez_str}'] = df_sorted[cols].eq(dez_str).any(axis=1).astype(int)
-    df_sorted['MM'] = df_sorted[f'Tem_{dez_str}'].rolling(50).mean()
-    fig, ax = plt.subplots()
-    ax.plot(df_sorted['Concurso'], df_sorted['MM'])
-    ax.set_xlabel('Concurso')
-    ax.set_ylabel('Probabilidade Estimada')
-    st.pyplot(fig)
+    chart = cached_chart(version, 'media_movel', (window, dez), lambda: series_line_chart(
+        stats['frequencia'][dez].dropna(), 'Concurso', 'Probabilidade Estimada'))
+    st.altair_chart(chart, use_container_width=True)
+    st.subheader("Frequência móvel de todas as dezenas")
+    png = cached_chart(version, 'mapa_media_movel', (window,), lambda: heatmap_png(
+        stats['frequencia'], 'Concurso', 'Dezena'))
+    st.image(png, use_container_width=True)
+    st.line_chart(pd.DataFrame({'Pares (média)': stats['pares'], 'Soma (média)': stats['soma'] / 15}))
 
 # 6) Pares & Trincas
 elif section == 'Pares & Trincas':
     st.title("Pares e Trincas Mais Comuns")
-    all_rows = df[cols].astype(str).values
+    # Contagens mantidas incrementalmente em lotofacil_state.npz
+    state = load_state(df, cols)
     # Pares
-    pair_counts = Counter()
-    for row in all_rows:
-        for a, b in itertools.combinations(row, 2):
-            pair = tuple(sorted((a, b)))
-            pair_counts[pair] += 1
-    top_pairs = pd.DataFrame(pair_counts.most_common(10), columns=['Par', 'Frequência'])
+    top_pairs = pd.DataFrame(
+        [(tuple(str(n).zfill(2) for n in pair), cnt) for pair, cnt in state.top_pairs(10)],
+        columns=['Par', 'Frequência'])
     st.subheader("Top 10 Pares")
     st.dataframe(top_pairs)
     # Trincas
-    triple_counts = Counter()
-    for row in all_rows:
-        for trip in itertools.combinations(row, 3):
-            triple = tuple(sorted(trip))
-            triple_counts[triple] += 1
-    top_triples = pd.DataFrame(triple_counts.most_common(10), columns=['Trinca', 'Frequência'])
+    top_triples = pd.DataFrame(
+        [(tuple(str(n).zfill(2) for n in trip), cnt) for trip, cnt in state.top_triples(10)],
+        columns=['Trinca', 'Frequência'])
     st.subheader("Top 10 Trincas")
     st.dataframe(top_triples)
+    # Grupos maiores e grupos arbitrários, direto das máscaras dos sorteios
+    st.subheader("Grupos Mais Comuns")
+    k = st.slider("Tamanho do grupo (4 = quadras, 5 = quinas...):", 4, 7, 4)
+    top_groups = pd.DataFrame(
+        [(tuple(str(n).zfill(2) for n in group), cnt) for group, cnt in top_subsets(store, k, 10)],
+        columns=['Grupo', 'Frequência'])
+    st.dataframe(top_groups)
+    st.subheader("Frequência de um Grupo")
+    group = st.multiselect("Dezenas do grupo:", list(range(1, 26)), default=[1, 2, 3, 4, 5])
+    if group:
+        st.markdown(f"**Sorteios com todas as dezenas do grupo:** {subset_frequency(store, group)}")
 
 # Footer
 st.markdown("---")
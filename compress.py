@@ -1,22 +1,291 @@
-import ffmpeg
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import ffmpeg
 
 # se quiser adicionar dinamicamente:
 # os.environ['PATH'] += os.pathsep + r"C:\ffmpeg\bin"
 
-input_file  = "videos/video1.mp4"            # ou "videos\\video1.mp4"
-output_file = "videos/video1_compressed.mp4"
-
-(
-    ffmpeg
-    .input(input_file)
-    .output(output_file,
-            vcodec='libx264',
-            video_bitrate='800k',
-            acodec='aac',
-            audio_bitrate='128k',
-            preset='medium',
-            movflags='faststart'
-    )
-    .run(overwrite_output=True)
-)
+VIDEO_CODEC = 'libx264'
+VIDEO_BITRATE = '800k'
+AUDIO_CODEC = 'aac'
+AUDIO_BITRATE = '128k'
+PRESET = 'medium'
+SUFIXO = '_compressed'
+EXTENSOES = ('.avi', '.mkv', '.mov', '.mp4')
+MANIFESTO = '.compress_manifest.json'
+# Vídeos com mais de dois segmentos são divididos nos keyframes e codificados em paralelo
+SEGUNDOS_POR_SEGMENTO = 120
+# Um H.264 até esta fração acima de VIDEO_BITRATE já conta como comprimido
+FOLGA_TAXA = 1.25
+
+
+# --- Manifesto ---
+
+def sha256_arquivo(path, bloco=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            digest.update(parte)
+    return digest.hexdigest()
+
+
+def carregar_manifesto(pasta):
+    """Loads the manifest: content hashes per file and the compressed source/output pairs."""
+    path = os.path.join(pasta, MANIFESTO)
+    if not os.path.exists(path):
+        return {'arquivos': {}, 'comprimidos': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_manifesto(pasta, manifesto):
+    path = os.path.join(pasta, MANIFESTO)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def hash_arquivo(manifesto, path):
+    """Content hash of a file, recomputed only when its size or mtime changed."""
+    stat = os.stat(path)
+    nome = os.path.abspath(path)
+    registro = manifesto['arquivos'].get(nome)
+    if registro is None or registro['tamanho'] != stat.st_size or registro['mtime_ns'] != stat.st_mtime_ns:
+        registro = {'tamanho': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256_arquivo(path)}
+        manifesto['arquivos'][nome] = registro
+    return registro['sha256']
+
+
+# --- ffprobe ---
+
+def _taxa_bps(texto):
+    texto = str(texto).lower()
+    return int(float(texto[:-1]) * 1000) if texto.endswith('k') else int(float(texto))
+
+
+def informacoes(path):
+    """Duration, video codec, video bitrate (bit/s, None when unknown) and audio presence of a file."""
+    probe = ffmpeg.probe(path)
+    video = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+    if video is None:
+        raise ValueError(f"{path} não tem faixa de vídeo.")
+    taxa = video.get('bit_rate') or probe['format'].get('bit_rate')
+    return {
+        'duracao': float(probe['format'].get('duration') or video.get('duration') or 0),
+        'codec': video['codec_name'],
+        'taxa': int(taxa) if taxa else None,
+        'audio': any(s['codec_type'] == 'audio' for s in probe['streams']),
+    }
+
+
+def motivo_para_pular(path, info, manifesto):
+    """Returns why a file needs no compression, or None."""
+    digest = hash_arquivo(manifesto, path)
+    if digest in manifesto['comprimidos']:
+        return f"já comprimido em {manifesto['comprimidos'][digest]['saida']}"
+    if any(registro['sha256_saida'] == digest for registro in manifesto['comprimidos'].values()):
+        return "é saída de uma compressão anterior"
+    if info['codec'] == 'h264' and info['taxa'] and info['taxa'] <= _taxa_bps(VIDEO_BITRATE) * FOLGA_TAXA:
+        return f"já em H.264 a {info['taxa'] // 1000} kb/s"
+    return None
+
+
+# --- ffmpeg ---
+
+def _executar(stream, progresso=None):
+    """Runs an ffmpeg command, reporting encoded seconds from its ``-progress`` output."""
+    processo = (stream.global_args('-progress', 'pipe:1', '-nostats', '-loglevel', 'error')
+                .overwrite_output()
+                .run_async(pipe_stdout=True, pipe_stderr=True))
+    for linha in processo.stdout:
+        chave, _, valor = linha.decode('utf-8', 'replace').strip().partition('=')
+        # out_time_us (e o antigo out_time_ms, que também está em microssegundos)
+        if chave in ('out_time_us', 'out_time_ms') and valor.isdigit() and progresso is not None:
+            progresso(int(valor) / 1e6)
+    erro = processo.stderr.read().decode('utf-8', 'replace')
+    if processo.wait() != 0:
+        raise RuntimeError(f"ffmpeg falhou: {erro.strip()}")
+
+
+def dividir(entrada, pasta, segundos=SEGUNDOS_POR_SEGMENTO):
+    """Splits the video stream on keyframes into ~``segundos`` segments, without re-encoding."""
+    padrao = os.path.join(pasta, 'segmento_%05d.mkv')
+    _executar(ffmpeg.input(entrada).output(padrao, map='0:v:0', c='copy', f='segment',
+                                           segment_time=segundos, reset_timestamps=1))
+    return sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.startswith('segmento_'))
+
+
+def codificar_video(entrada, saida, threads, progresso=None):
+    _executar(ffmpeg.input(entrada).output(saida, vcodec=VIDEO_CODEC, video_bitrate=VIDEO_BITRATE, preset=PRESET,
+                                           threads=threads, an=None), progresso)
+
+
+def codificar_audio(entrada, saida):
+    _executar(ffmpeg.input(entrada).output(saida, vn=None, acodec=AUDIO_CODEC, audio_bitrate=AUDIO_BITRATE))
+
+
+def codificar_completo(entrada, saida, threads, progresso=None):
+    _executar(ffmpeg.input(entrada).output(saida, vcodec=VIDEO_CODEC, video_bitrate=VIDEO_BITRATE,
+                                           acodec=AUDIO_CODEC, audio_bitrate=AUDIO_BITRATE, preset=PRESET,
+                                           threads=threads, movflags='faststart'), progresso)
+
+
+def juntar(segmentos, audio, saida):
+    """Concatenates encoded segments (and the audio track) with the concat demuxer, without re-encoding."""
+    lista = os.path.join(os.path.dirname(segmentos[0]), 'lista.txt')
+    with open(lista, 'w', encoding='utf-8') as f:
+        for segmento in segmentos:
+            f.write(f"file '{os.path.abspath(segmento)}'\n")
+    video = ffmpeg.input(lista, f='concat', safe=0)
+    streams = [video['v']] if audio is None else [video['v'], ffmpeg.input(audio)['a']]
+    _executar(ffmpeg.output(*streams, saida, c='copy', movflags='faststart'))
+
+
+# --- Serviço ---
+
+class _Progresso:
+    """Aggregates encoded seconds per file across its parallel jobs and prints every 10%."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._feito = {}
+        self._duracao = {}
+        self._impresso = {}
+
+    def registrar(self, arquivo, duracao):
+        self._duracao[arquivo] = duracao
+        self._impresso[arquivo] = 0
+
+    def callback(self, arquivo, tarefa):
+        def atualizar(segundos):
+            with self._lock:
+                self._feito[arquivo, tarefa] = segundos
+                total = sum(v for (a, _), v in self._feito.items() if a == arquivo)
+                pct = min(100, int(100 * total / max(self._duracao[arquivo], 1e-9)) // 10 * 10)
+                if pct > self._impresso[arquivo]:
+                    self._impresso[arquivo] = pct
+                    print(f"  {os.path.basename(arquivo)}: {pct}%")
+        return atualizar
+
+
+def comprimir_pasta(pasta, destino=None, workers=None, segundos_por_segmento=SEGUNDOS_POR_SEGMENTO):
+    """Compresses every video in ``pasta`` that is not already compressed into ``destino``.
+
+    Files are skipped when the manifest (content hashes) shows they were
+    compressed or are outputs, or when ffprobe finds H.264 near the target
+    bitrate. The rest run through a pool of ``workers`` ffmpeg jobs: short
+    files are encoded whole; long ones are split on keyframes, their
+    segments encoded in parallel with the audio encoded once, and the
+    parts joined with stream copy. Returns the list of outputs written.
+    """
+    destino = destino or pasta
+    os.makedirs(destino, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    # Os encodes já rodam em paralelo, então cada ffmpeg fica com sua fração dos núcleos
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    manifesto = carregar_manifesto(destino)
+    progresso = _Progresso()
+
+    arquivos = []
+    for nome in sorted(os.listdir(pasta)):
+        path = os.path.join(pasta, nome)
+        stem, ext = os.path.splitext(nome)
+        if ext.lower() not in EXTENSOES or stem.endswith(SUFIXO) or not os.path.isfile(path):
+            continue
+        try:
+            info = informacoes(path)
+            motivo = motivo_para_pular(path, info, manifesto)
+        except (ffmpeg.Error, ValueError, KeyError, OSError) as erro:
+            # Um arquivo corrompido ou ilegível não impede a compressão dos demais
+            detalhe = erro.stderr.decode('utf-8', 'replace').strip() if isinstance(erro, ffmpeg.Error) else erro
+            print(f"Pulando {nome}: {detalhe or erro}")
+            continue
+        if motivo:
+            print(f"Pulando {nome}: {motivo}")
+        else:
+            arquivos.append((path, info))
+    salvar_manifesto(destino, manifesto)
+
+    estado, pendentes, saidas = {}, {}, []
+    comeco = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def enviar(arquivo, etapa, func, *args):
+            pendentes[executor.submit(func, *args)] = (arquivo, etapa)
+
+        for path, info in arquivos:
+            temporaria = tempfile.mkdtemp(prefix='.' + os.path.basename(path) + '.', dir=destino)
+            saida = os.path.join(destino, os.path.splitext(os.path.basename(path))[0] + SUFIXO + '.mp4')
+            estado[path] = {'info': info, 'pasta': temporaria, 'saida': saida, 'falhou': False,
+                            'parcial': os.path.join(temporaria, 'saida.mp4')}
+            progresso.registrar(path, info['duracao'])
+            if info['duracao'] > 2 * segundos_por_segmento:
+                enviar(path, 'dividir', dividir, path, temporaria, segundos_por_segmento)
+            else:
+                enviar(path, 'final', codificar_completo, path, estado[path]['parcial'], threads,
+                       progresso.callback(path, 'completo'))
+
+        while pendentes:
+            concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                path, etapa = pendentes.pop(futuro)
+                e = estado[path]
+                try:
+                    resultado = futuro.result()
+                except Exception as erro:
+                    print(f"Erro em {os.path.basename(path)} ({etapa}): {erro}")
+                    e['falhou'] = True
+                if e['falhou']:
+                    if not any(a == path for a, _ in pendentes.values()):
+                        shutil.rmtree(e['pasta'], ignore_errors=True)
+                    continue
+
+                if etapa == 'dividir':
+                    e['segmentos'] = [s[:-4] + '_x264.mkv' for s in resultado]
+                    e['audio'] = os.path.join(e['pasta'], 'audio.m4a') if e['info']['audio'] else None
+                    e['faltam'] = len(resultado) + (e['audio'] is not None)
+                    print(f"{os.path.basename(path)}: {len(resultado)} segmentos")
+                    for i, (origem, codificado) in enumerate(zip(resultado, e['segmentos'])):
+                        enviar(path, 'parte', codificar_video, origem, codificado, threads,
+                               progresso.callback(path, i))
+                    if e['audio'] is not None:
+                        enviar(path, 'parte', codificar_audio, path, e['audio'])
+                elif etapa == 'parte':
+                    e['faltam'] -= 1
+                    if e['faltam'] == 0:
+                        enviar(path, 'final', juntar, e['segmentos'], e['audio'], e['parcial'])
+                else:
+                    os.replace(e['parcial'], e['saida'])
+                    shutil.rmtree(e['pasta'], ignore_errors=True)
+                    manifesto['comprimidos'][hash_arquivo(manifesto, path)] = {
+                        'origem': os.path.abspath(path), 'saida': os.path.abspath(e['saida']),
+                        'sha256_saida': hash_arquivo(manifesto, e['saida'])}
+                    salvar_manifesto(destino, manifesto)
+                    saidas.append(e['saida'])
+                    print(f"Concluído {os.path.basename(path)} -> {e['saida']}")
+
+    print(f"{len(saidas)} de {len(arquivos)} vídeos comprimidos em {time.perf_counter() - comeco:.1f} s")
+    return saidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprime os vídeos de uma pasta com ffmpeg em paralelo.")
+    parser.add_argument('pasta', nargs='?', default='videos')
+    parser.add_argument('--destino', default=None, help="Pasta de saída (padrão: a própria pasta)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Encodes simultâneos")
+    parser.add_argument('--segmento', type=int, default=SEGUNDOS_POR_SEGMENTO, help="Segundos por segmento")
+    args = parser.parse_args()
+    comprimir_pasta(args.pasta, args.destino, args.workers, args.segmento)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,19 @@
 #!/usr/bin/env python3
 
-import pandas as pd
+import numpy as np
 from collections import Counter
 import matplotlib.pyplot as plt
 import seaborn as sns
-# Load the CSV file
-file_path = 'lotofacil.csv' # Assumes the CSV is in the same directory as the script
-df = pd.read_csv(file_path)
 
-# Data Cleaning and Preparation
-# Drop rows with any missing values in the 'Dezena' columns
-dezenas_cols = [f'Dezena{i}' for i in range(1, 16)]
-df.dropna(subset=dezenas_cols, inplace=True)
-
-# Convert 'Dezena' columns to integer type
-for col in dezenas_cols:
-    df[col] = df[col].astype(int)
+from lotofacil_data import load_data
+from lotofacil_store import DrawStore, popcount, EVEN_MASK, PRIME_MASK
 
 # --- Analysis Functions ---
 
 def analyze_number_frequency(df, dezenas_cols):
     """Calculates and prints the frequency of each number drawn."""
-    all_numbers = []
-    for col in dezenas_cols:
-        all_numbers.extend(df[col].tolist())
-    number_counts = Counter(all_numbers)
+    counts = DrawStore.from_frame(df, dezenas_cols).number_counts()
+    number_counts = Counter({num: int(counts[num - 1]) for num in range(1, 26) if counts[num - 1] > 0})
     print("\n--- Frequência dos Números (Todos os Sorteios) ---")
     for num, count in sorted(number_counts.items()):
         print(f"Número {num}: {count} vezes")
@@ -32,13 +21,9 @@ def analyze_number_frequency(df, dezenas_cols):
 
 def analyze_even_odd(df, dezenas_cols):
     """Analyzes and prints the distribution of even and odd numbers."""
-    even_odd_counts = {'pares': 0, 'ímpares': 0}
-    for col in dezenas_cols:
-        for num in df[col]:
-            if num % 2 == 0:
-                even_odd_counts['pares'] += 1
-            else:
-                even_odd_counts['ímpares'] += 1
+    store = DrawStore.from_frame(df, dezenas_cols)
+    pares = int(popcount(store.masks & EVEN_MASK).sum())
+    even_odd_counts = {'pares': pares, 'ímpares': len(store) * len(dezenas_cols) - pares}
     print("\n--- Análise de Pares/Ímpares ---")
     print(f"Números Pares: {even_odd_counts['pares']}")
     print(f"Números Ímpares: {even_odd_counts['ímpares']}")
@@ -54,13 +39,9 @@ def is_prime(n):
 
 def analyze_prime_numbers(df, dezenas_cols):
     """Analyzes and prints the distribution of prime numbers."""
-    prime_counts = {'primos': 0, 'não primos': 0}
-    for col in dezenas_cols:
-        for num in df[col]:
-            if is_prime(num):
-                prime_counts['primos'] += 1
-            else:
-                prime_counts['não primos'] += 1
+    store = DrawStore.from_frame(df, dezenas_cols)
+    primos = int(popcount(store.masks & PRIME_MASK).sum())
+    prime_counts = {'primos': primos, 'não primos': len(store) * len(dezenas_cols) - primos}
     print("\n--- Análise de Números Primos ---")
     print(f"Números Primos: {prime_counts['primos']}")
     print(f"Números Não Primos: {prime_counts['não primos']}")
@@ -68,15 +49,15 @@ def analyze_prime_numbers(df, dezenas_cols):
 
 def analyze_sequences(df, dezenas_cols, length=3):
     """Identifies sequences of a given length within each draw."""
-    sequence_counts = Counter()
-    for index, row in df.iterrows():
-        numbers_in_draw = sorted([row[col] for col in dezenas_cols])
-        for i in range(len(numbers_in_draw) - length + 1):
-            sequence = tuple(numbers_in_draw[i:i+length])
-            # Check if the sequence is consecutive
-            is_consecutive = all(sequence[j] + 1 == sequence[j+1] for j in range(len(sequence)-1))
-            if is_consecutive:
-                sequence_counts[sequence] += 1
+    masks = DrawStore.from_frame(df, dezenas_cols).masks
+    # Uma sequência start..start+length-1 está no sorteio quando todos os seus bits estão na máscara
+    starts = np.arange(1, 26 - length + 1)
+    run_masks = ((np.uint32(1) << np.uint32(length)) - np.uint32(1)) << (starts - 1).astype(np.uint32)
+    hits = ((masks[:, None] & run_masks) == run_masks).sum(axis=0)
+    sequence_counts = Counter({
+        tuple(range(start, start + length)): int(count)
+        for start, count in zip(starts.tolist(), hits) if count > 0
+    })
     print(f"\n--- Sequências de {length} Números Mais Comuns ---")
     for seq, count in sequence_counts.most_common(10):
         print(f"Sequência {seq}: {count} vezes")
@@ -96,6 +77,7 @@ def plot_number_frequency(number_counts):
     plt.xticks(rotation=90)
     plt.tight_layout()
     plt.savefig('lotofacil_frequencia.png')
+    plt.close()
     print("\nGráfico de frequência salvo como lotofacil_frequencia.png")
 
 def plot_even_odd_distribution(even_odd_counts):
@@ -104,6 +86,7 @@ def plot_even_odd_distribution(even_odd_counts):
     plt.pie(even_odd_counts.values(), labels=even_odd_counts.keys(), autopct='%1.1f%%', startangle=90)
     plt.title('Distribuição de Números Pares e Ímpares')
     plt.savefig('lotofacil_pares_impares.png')
+    plt.close()
     print("Gráfico de pizza de pares/ímpares salvo como lotofacil_pares_impares.png")
 
 def plot_prime_distribution(prime_counts):
@@ -112,10 +95,15 @@ def plot_prime_distribution(prime_counts):
     plt.pie(prime_counts.values(), labels=prime_counts.keys(), autopct='%1.1f%%', startangle=90)
     plt.title('Distribuição de Números Primos')
     plt.savefig('lotofacil_primos.png')
+    plt.close()
     print("Gráfico de pizza de números primos salvo como lotofacil_primos.png")
 
 # --- Main Execution ---
-if __name__ == "__main__":
+def main(file_path='lotofacil.csv'):
+    # Load the CSV file through the shared loader: rows without all 15 numbers are
+    # dropped, dezenas are validated uint8 and contests are sorted
+    df, dezenas_cols = load_data(file_path)
+
     print("Análise Estatística dos Resultados da Lotofácil")
     print("=================================================")
 
@@ -133,3 +121,6 @@ if __name__ == "__main__":
 
     print("\nAnálise concluída. Os gráficos foram salvos no diretório atual.")
 
+
+if __name__ == "__main__":
+    main()
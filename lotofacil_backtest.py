@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lotofacil_data import load_store
+from lotofacil_generators import generate_batch
+from lotofacil_store import encode_draws, mask_to_numbers, popcount
+
+HIT_LEVELS = range(11, 16)
+RESULT_COLUMNS = ['Concurso', 'Estrategia', 'Jogos'] + [f'Acertos{h}' for h in HIT_LEVELS] + ['MediaAcertos']
+
+
+# --- Strategies ---
+# Cada estratégia recebe o contexto do concurso (apenas dados anteriores a ele)
+# e devolve os parâmetros de generate_batch.
+
+def _frequency_params(ctx):
+    counts = ctx['counts_before']
+    return {'number_counts': Counter({n: int(counts[n - 1]) for n in range(1, 26) if counts[n - 1] > 0})}
+
+
+def _overdue_params(ctx):
+    # Mesma convenção de analyze_overdue_numbers sobre todo o histórico anterior
+    history = ctx['history_len']
+    last_seen = np.where(ctx['last_seen_before'] < 0, -history, ctx['last_seen_before'])
+    overdue = history - 1 - last_seen
+    return {'overdue_counts': {n: int(overdue[n - 1]) for n in range(1, 26)}}
+
+
+def _repeated_params(ctx, num_to_repeat=9):
+    return {'last_draw_numbers': mask_to_numbers(ctx['previous_mask']), 'num_to_repeat': num_to_repeat}
+
+
+STRATEGIES = {
+    'random': ('random', lambda ctx: {}),
+    'frequency': ('frequency', _frequency_params),
+    'even_odd': ('even_odd', lambda ctx: {'num_evens': 7, 'num_odds': 8}),
+    'prime': ('prime', lambda ctx: {'num_primes_desired': 5}),
+    'overdue': ('overdue', _overdue_params),
+    'repeated': ('repeated', _repeated_params),
+}
+
+
+# --- History Snapshots ---
+
+def history_snapshots(store):
+    """Returns, for every row i, the counts and last-seen rows over rows < i.
+
+    Both are (N, 25) arrays built in one cumulative pass, so each contest
+    can be replayed without looking at its own draw or any later one.
+    """
+    incidence = store.incidence
+    counts_before = np.zeros((len(store), 25), dtype=np.int32)
+    np.cumsum(incidence[:-1], axis=0, dtype=np.int32, out=counts_before[1:])
+    rows = np.arange(len(store))[:, None]
+    last_seen_upto = np.maximum.accumulate(np.where(incidence.astype(bool), rows, -1), axis=0)
+    last_seen_before = np.full((len(store), 25), -1, dtype=np.int64)
+    last_seen_before[1:] = last_seen_upto[:-1]
+    return counts_before, last_seen_before
+
+
+def score_tickets(tickets, draw_mask):
+    """Returns how many tickets hit 11, 12, ..., 15 numbers of the draw, and the mean hits."""
+    hits = popcount(encode_draws(tickets) & np.uint32(draw_mask))
+    per_level = np.bincount(hits, minlength=16)[11:16]
+    return per_level, float(hits.mean())
+
+
+# --- Runner ---
+
+def _run_chunk(task):
+    rows, concursos, masks, previous_masks, counts_before, last_seen_before, strategies, n_tickets, seed = task
+    records = []
+    for j, row in enumerate(rows):
+        ctx = {
+            'history_len': int(row),
+            'counts_before': counts_before[j],
+            'last_seen_before': last_seen_before[j],
+            'previous_mask': int(previous_masks[j]),
+        }
+        for s, name in enumerate(strategies):
+            generator, params = STRATEGIES[name]
+            rng_seed = np.random.SeedSequence([seed, int(row), s])
+            tickets = generate_batch(generator, n_tickets, rng_seed, **params(ctx))
+            per_level, mean_hits = score_tickets(tickets, masks[j])
+            records.append([int(concursos[j]), name, n_tickets, *per_level.tolist(), mean_hits])
+    return pd.DataFrame(records, columns=RESULT_COLUMNS)
+
+
+def _tasks(store, strategies, n_tickets, start, chunk_size, seed):
+    counts_before, last_seen_before = history_snapshots(store)
+    for first in range(max(start, 1), len(store), chunk_size):
+        rows = np.arange(first, min(first + chunk_size, len(store)))
+        yield (rows, store.concursos[rows], store.masks[rows], store.masks[rows - 1],
+               counts_before[rows], last_seen_before[rows], strategies, n_tickets, seed)
+
+
+def run_backtest(store, strategies=None, n_tickets=1000, start=100, chunk_size=50, workers=None, seed=0):
+    """Replays every contest from row ``start`` on and scores each strategy's tickets.
+
+    Yields one DataFrame per chunk of contests, in contest order, as soon
+    as it is ready. Chunks run in a process pool of ``workers`` processes
+    (``workers=1`` runs in-process). Results are reproducible for a given
+    ``seed`` regardless of the number of workers or the chunk size.
+    """
+    strategies = list(STRATEGIES) if strategies is None else list(strategies)
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Estratégias desconhecidas: {sorted(unknown)}. Opções: {list(STRATEGIES)}")
+    tasks = _tasks(store, strategies, n_tickets, start, chunk_size, seed)
+    if workers == 1:
+        yield from map(_run_chunk, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_run_chunk, tasks)
+
+
+def summarize(results):
+    """Aggregates backtest rows into totals per strategy."""
+    totals = results.groupby('Estrategia').agg(
+        Concursos=('Concurso', 'count'),
+        Jogos=('Jogos', 'sum'),
+        **{f'Acertos{h}': (f'Acertos{h}', 'sum') for h in HIT_LEVELS},
+        MediaAcertos=('MediaAcertos', 'mean'),
+    )
+    return totals.sort_values('MediaAcertos', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest das estratégias de geração sobre o histórico.")
+    parser.add_argument('--csv', default='lotofacil.csv')
+    parser.add_argument('--output', default='backtest.csv')
+    parser.add_argument('--tickets', type=int, default=1000, help="Jogos por estratégia e concurso")
+    parser.add_argument('--start', type=int, default=100, help="Concursos de histórico antes do primeiro replay")
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    store = load_store(args.csv)
+    parts = []
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        for i, part in enumerate(run_backtest(store, args.strategies, args.tickets, args.start,
+                                              args.chunk_size, args.workers, args.seed)):
+            part.to_csv(f, header=(i == 0), index=False)
+            f.flush()
+            parts.append(part)
+            print(f"Concurso {part['Concurso'].iloc[-1]} processado", end='\r')
+    print()
+    if parts:
+        print(summarize(pd.concat(parts, ignore_index=True)).to_string())
+    print(f"Resultados salvos em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import lotofacil_analysis_manus as manus
+import lotofacil_core_analysis as core
+import lotofacil_cooccurrence
+import lotofacil_windows
+from lotofacil_data import DEZENAS_COLS, validate_draws
+from lotofacil_delays import build_delay_tracker, gap_sequences
+from lotofacil_generators import STRATEGIES, generate_batch
+from lotofacil_store import DrawStore
+
+DEFAULT_SIZES = (3_000, 100_000, 1_000_000)
+DEFAULT_BASELINE_PATH = 'benchmark_baseline.json'
+DEFAULT_TOLERANCE = 0.25
+# Abaixo destas diferenças absolutas a variação é ruído de medição, não regressão
+MIN_SLACK_SECONDS = 0.005
+MIN_SLACK_MB = 1.0
+SINGLE_TICKETS = 1_000
+BATCH_TICKETS = 100_000
+
+
+# --- Synthetic History ---
+
+def synthetic_history(n_draws, seed=0):
+    """Returns ``(df, dezenas_cols)`` with n_draws uniform 15-of-25 contests in the load_data schema."""
+    tickets = generate_batch('random', n_draws, seed=seed)
+    df = pd.DataFrame(tickets, columns=DEZENAS_COLS)
+    df.insert(0, 'Concurso', np.arange(1, n_draws + 1, dtype=np.int32))
+    return validate_draws(df), list(DEZENAS_COLS)
+
+
+# --- Cases ---
+# Cada caso recebe o contexto de um histórico e devolve quantas unidades
+# (concursos ou jogos) processou, usadas no cálculo da vazão.
+
+def _clear_caches():
+    """Drops the per-fingerprint module caches so every run recomputes."""
+    lotofacil_cooccurrence.clear_cache()
+    lotofacil_windows.clear_cache()
+
+
+def _quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def _analysis(func, *params):
+    # Mesma entrada do app: o DrawStore já codificado, custo só da consulta
+    def run(ctx):
+        func(ctx['store'], ctx['cols'], *params)
+        return len(ctx['store'])
+    return run
+
+
+def _manus(func, *params):
+    def run(ctx):
+        _quiet(func, ctx['df'], ctx['cols'], *params)
+        return len(ctx['df'])
+    return run
+
+
+def _store_case(func):
+    def run(ctx):
+        func(ctx['store'])
+        return len(ctx['store'])
+    return run
+
+
+def _each_window(store, windows=(10, 20, 50, 100, 200)):
+    stats = lotofacil_windows.rolling_window_stats(store, windows)
+    for window in stats:
+        stats[window]  # as janelas são calculadas sob demanda
+
+
+def _single_tickets(func, make_args):
+    def run(ctx):
+        args = make_args(ctx)
+        for _ in range(SINGLE_TICKETS):
+            func(*args)
+        return SINGLE_TICKETS
+    return run
+
+
+def _batch_tickets(strategy, make_params):
+    def run(ctx):
+        generate_batch(strategy, BATCH_TICKETS, seed=0, **make_params(ctx))
+        return BATCH_TICKETS
+    return run
+
+
+BATCH_PARAMS = {
+    'random': lambda ctx: {},
+    'frequency': lambda ctx: {'number_counts': ctx['frequencia']},
+    'even_odd': lambda ctx: {'num_evens': 7, 'num_odds': 8},
+    'prime': lambda ctx: {'num_primes_desired': 5},
+    'overdue': lambda ctx: {'overdue_counts': ctx['atrasos']},
+    'repeated': lambda ctx: {'last_draw_numbers': ctx['df'][ctx['cols']].iloc[-1], 'num_to_repeat': 9},
+}
+
+CASES = {
+    'analyze_even_odd_per_draw': _analysis(core.analyze_even_odd_per_draw),
+    'analyze_primes_per_draw': _analysis(core.analyze_primes_per_draw),
+    'analyze_number_frequency': _analysis(core.analyze_number_frequency),
+    'analyze_overdue_numbers': _analysis(core.analyze_overdue_numbers),
+    'analyze_overdue_numbers[100]': _analysis(core.analyze_overdue_numbers, 100),
+    'analyze_repeated_numbers': _analysis(core.analyze_repeated_numbers),
+    'manus.analyze_number_frequency': _manus(manus.analyze_number_frequency),
+    'manus.analyze_even_odd': _manus(manus.analyze_even_odd),
+    'manus.analyze_prime_numbers': _manus(manus.analyze_prime_numbers),
+    'manus.analyze_sequences': _manus(manus.analyze_sequences),
+    'pares': _store_case(lambda store: lotofacil_cooccurrence.top_subsets(store, 2)),
+    'trincas': _store_case(lambda store: lotofacil_cooccurrence.top_subsets(store, 3)),
+    'quadras': _store_case(lambda store: lotofacil_cooccurrence.subset_counts(store, 4)),
+    'atrasos': _store_case(lambda store: build_delay_tracker(store).gap_statistics()),
+    'sequencias_atraso': _store_case(gap_sequences),
+    'media_movel': _store_case(_each_window),
+    'generate_numbers_frequency_based': _single_tickets(
+        core.generate_numbers_frequency_based, lambda ctx: (ctx['frequencia'],)),
+    'generate_numbers_even_odd_based': _single_tickets(core.generate_numbers_even_odd_based, lambda ctx: (7, 8)),
+    'generate_numbers_prime_based': _single_tickets(core.generate_numbers_prime_based, lambda ctx: (5,)),
+    'generate_numbers_overdue_based': _single_tickets(
+        core.generate_numbers_overdue_based, lambda ctx: (ctx['atrasos'],)),
+    'generate_numbers_overdue_based[top]': _single_tickets(
+        core.generate_numbers_overdue_based, lambda ctx: (ctx['atrasos'], 15, 18)),
+    'generate_numbers_repeated_based': _single_tickets(
+        core.generate_numbers_repeated_based, lambda ctx: (ctx['df'], ctx['cols'], 9)),
+    **{f'generate_batch[{strategy}]': _batch_tickets(strategy, BATCH_PARAMS[strategy]) for strategy in STRATEGIES},
+}
+
+
+# --- Measurement ---
+
+def measure(case, ctx, repeats=3):
+    """Best wall time over ``repeats`` runs plus the tracemalloc peak of one extra run."""
+    times = []
+    for _ in range(repeats):
+        _clear_caches()
+        start = time.perf_counter()
+        units = case(ctx)
+        times.append(time.perf_counter() - start)
+    # Pico medido à parte: o tracemalloc deixa as alocações mais lentas
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        case(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    best = min(times)
+    return {'segundos': best, 'por_segundo': units / best if best > 0 else float('inf'), 'pico_mb': peak / 2 ** 20}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, cases=None, repeats=3, seed=0):
+    """Runs the selected cases on synthetic histories of each size.
+
+    Returns ``{'<case>@<size>': {'segundos', 'por_segundo', 'pico_mb'}}``;
+    throughput counts contests for analyses and tickets for generators.
+    """
+    cases = list(CASES) if cases is None else list(cases)
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Casos desconhecidos: {sorted(unknown)}. Opções: {list(CASES)}")
+    results = {}
+    for size in sizes:
+        df, cols = synthetic_history(size, seed)
+        ctx = {'df': df, 'cols': cols, 'store': DrawStore.from_frame(df, cols)}
+        ctx['frequencia'] = core.analyze_number_frequency(ctx['store'], cols)
+        ctx['atrasos'] = core.analyze_overdue_numbers(ctx['store'], cols, 100)
+        for name in cases:
+            results[f'{name}@{size}'] = measure(CASES[name], ctx, repeats)
+            print(f"{name:>40} @ {size:>9,}: {results[f'{name}@{size}']['segundos'] * 1000:10.2f} ms", flush=True)
+    return results
+
+
+# --- Baseline ---
+
+def save_baseline(results, path=DEFAULT_BASELINE_PATH):
+    """Writes results to the baseline file, keeping entries of cases and sizes not measured now."""
+    baseline = load_baseline(path) or {'resultados': {}}
+    baseline['ambiente'] = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                            'maquina': platform.machine(), 'processadores': os.cpu_count()}
+    baseline['resultados'].update(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns a table of results against the baseline with a Regressao flag per entry.
+
+    An entry regresses when its time or peak memory grows by more than
+    ``tolerance`` and by more than the absolute noise margins.
+    """
+    records = []
+    for key, current in results.items():
+        name, size = key.rsplit('@', 1)
+        base = baseline['resultados'].get(key) if baseline else None
+        record = {'Caso': name, 'Concursos': int(size), 'Segundos': current['segundos'],
+                  'PorSegundo': current['por_segundo'], 'PicoMB': current['pico_mb'],
+                  'BaseSegundos': np.nan, 'BasePicoMB': np.nan, 'Regressao': False}
+        if base is not None:
+            slower = current['segundos'] > base['segundos'] * (1 + tolerance) + MIN_SLACK_SECONDS
+            bigger = current['pico_mb'] > base['pico_mb'] * (1 + tolerance) + MIN_SLACK_MB
+            record.update(BaseSegundos=base['segundos'], BasePicoMB=base['pico_mb'], Regressao=slower or bigger)
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das análises e geradores com históricos sintéticos.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Concursos por histórico")
+    parser.add_argument('--cases', nargs='+', default=None, choices=list(CASES), metavar='CASO')
+    parser.add_argument('--repeats', type=int, default=3, help="Execuções por caso (vale a melhor)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help="Grava os resultados como nova base")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Piora relativa aceita")
+    parser.add_argument('--output', default=None, help="JSON com os resultados desta execução")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.cases, args.repeats)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    baseline = None if args.save else load_baseline(args.baseline)
+    table = compare(results, baseline, args.tolerance)
+    print()
+    print(table.to_string(index=False, float_format='{:.4g}'.format))
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"\nBase salva em {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nSem base em {args.baseline}; use --save para criar uma.")
+        return 0
+    regressions = table[table['Regressao']]
+    if len(regressions):
+        print(f"\n{len(regressions)} regressões acima de {args.tolerance:.0%}:")
+        print(regressions[['Caso', 'Concursos', 'Segundos', 'BaseSegundos', 'PicoMB', 'BasePicoMB']]
+              .to_string(index=False, float_format='{:.4g}'.format))
+        return 1
+    print("\nSem regressões em relação à base.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+
+from cachetools import LRUCache
+
+from lotofacil_data import DEFAULT_CSV_PATH, load_data
+from lotofacil_query import filters_key, select_rows
+from lotofacil_store import DrawStore
+
+# Cache de processo: no Streamlit é compartilhado por todas as sessões.
+# Os valores guardados são compartilhados, então quem os recebe não deve alterá-los.
+CACHE_SIZE = 256
+
+_cache = LRUCache(maxsize=CACHE_SIZE)
+_lock = threading.RLock()
+_key_locks = {}
+_warmed_versions = set()
+
+
+def data_version(csv_path=DEFAULT_CSV_PATH):
+    """Returns a cheap version tag for the CSV (mtime and size), used in every cache key."""
+    stat = os.stat(csv_path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+def get_or_compute(key, compute):
+    """Returns the cached value for ``key``, computing it once if missing.
+
+    Concurrent callers asking for the same missing key wait for a single
+    computation instead of repeating it.
+    """
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            if key in _cache:
+                return _cache[key]
+        try:
+            value = compute()
+            with _lock:
+                _cache[key] = value
+        finally:
+            with _lock:
+                _key_locks.pop(key, None)
+        return value
+
+
+def cached_load_data(csv_path=DEFAULT_CSV_PATH):
+    """Loads the draw history once per data version; returns ``(df, dezenas_cols, version)``."""
+    version = data_version(csv_path)
+    df, dezenas_cols = get_or_compute((version, 'load_data', csv_path), lambda: load_data(csv_path))
+    return df, dezenas_cols, version
+
+
+def cached_store(version, df, dezenas_cols):
+    """Returns the DrawStore of the loaded history, built once per data version."""
+    return get_or_compute((version, 'store'), lambda: DrawStore.from_frame(df, dezenas_cols))
+
+
+def cached_rows(version, df, dezenas_cols, filters):
+    """Returns the row indices selected by ``filters`` (see lotofacil_query), once per version and filters."""
+    key = (version, 'rows', filters_key(filters))
+    return get_or_compute(key, lambda: select_rows(cached_store(version, df, dezenas_cols), **filters))
+
+
+def cached_analysis(version, func, df, dezenas_cols, *params, filters=None):
+    """Runs ``func(store, dezenas_cols, *params)`` through the cache, keyed by version and params.
+
+    ``store`` is the DrawStore of ``df`` from cached_store, so analyses
+    never re-encode the history. With ``filters`` the analysis runs only
+    on the selected rows (passed as ``rows``), and the filters become part
+    of the key.
+    """
+    if not filters:
+        key = (version, func.__module__, func.__name__, params)
+        return get_or_compute(key, lambda: func(cached_store(version, df, dezenas_cols), dezenas_cols, *params))
+    key = (version, func.__module__, func.__name__, params, filters_key(filters))
+    return get_or_compute(key, lambda: func(cached_store(version, df, dezenas_cols), dezenas_cols, *params,
+                                            rows=cached_rows(version, df, dezenas_cols, filters)))
+
+
+def warm_cache(version, df, dezenas_cols, jobs):
+    """Precomputes ``jobs`` (a list of ``(func, params)``) in a background thread.
+
+    Runs at most once per data version; returns the thread, or ``None`` if
+    this version was already warmed.
+    """
+    with _lock:
+        if version in _warmed_versions:
+            return None
+        _warmed_versions.add(version)
+
+    def run():
+        for func, params in jobs:
+            cached_analysis(version, func, df, dezenas_cols, *params)
+
+    thread = threading.Thread(target=run, name=f'lotofacil-warmup-{version}', daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _warmed_versions.clear()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import io
+
+import altair as alt
+import pandas as pd
+from matplotlib.figure import Figure
+
+from lotofacil_cache import get_or_compute
+
+# Os gráficos são montados uma vez por versão dos dados e parâmetros e ficam
+# no cache compartilhado de lotofacil_cache. As especificações Altair/Vega-Lite
+# são desenhadas pelo navegador; só o mapa de calor é renderizado no servidor.
+
+
+def cached_chart(version, name, params, build):
+    """Returns the chart built by ``build()``, cached by data version, chart name and params."""
+    return get_or_compute((version, 'chart', name, tuple(params)), build)
+
+
+# --- Altair Specs ---
+
+def number_bar_chart(values, title, y_title, sort_by_value=False):
+    """Bar chart of one value per number (``{number: value}``)."""
+    data = pd.DataFrame({'Número': [int(n) for n in values], y_title: list(values.values())})
+    sort = '-y' if sort_by_value else 'ascending'
+    return alt.Chart(data, title=title).mark_bar().encode(
+        x=alt.X('Número:O', sort=sort),
+        y=alt.Y(f'{y_title}:Q'),
+        color=alt.Color(f'{y_title}:Q', scale=alt.Scale(scheme='viridis'), legend=None),
+        tooltip=['Número', y_title],
+    )
+
+
+def distribution_chart(values, title, x_title):
+    """Bar chart of how many draws have each value of a per-draw count."""
+    count_data = values.value_counts().sort_index()
+    data = pd.DataFrame({x_title: count_data.index.astype(int), 'Sorteios': count_data.to_numpy()})
+    return alt.Chart(data, title=title).mark_bar().encode(
+        x=alt.X(f'{x_title}:O'),
+        y=alt.Y('Sorteios:Q', title='Número de Sorteios'),
+        tooltip=[x_title, 'Sorteios'],
+    )
+
+
+def pie_chart(values, title=None):
+    """Pie chart of ``{label: value}`` with percentages in the tooltip."""
+    data = pd.DataFrame({'Categoria': list(values), 'Total': list(values.values())})
+    data['Percentual'] = data['Total'] / data['Total'].sum()
+    return alt.Chart(data, title=title or '').mark_arc().encode(
+        theta=alt.Theta('Total:Q'),
+        color=alt.Color('Categoria:N'),
+        tooltip=['Categoria', 'Total', alt.Tooltip('Percentual:Q', format='.1%')],
+    )
+
+
+def series_line_chart(series, x_title, y_title):
+    """Line chart of a Series against its index."""
+    data = pd.DataFrame({x_title: series.index.to_numpy(), y_title: series.to_numpy()})
+    return alt.Chart(data).mark_line().encode(
+        x=alt.X(f'{x_title}:Q'),
+        y=alt.Y(f'{y_title}:Q'),
+        tooltip=[x_title, y_title],
+    )
+
+
+# --- Rendered Images ---
+
+def render_figure(draw, figsize=(10, 6), fmt='png', dpi=100):
+    """Draws on a new figure with ``draw(fig, ax)`` and returns the encoded bytes.
+
+    Uses a standalone Figure (outside pyplot's registry), cleared before
+    returning, so repeated renders do not accumulate figures in memory.
+    """
+    fig = Figure(figsize=figsize)
+    try:
+        ax = fig.subplots()
+        draw(fig, ax)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def heatmap_png(frame, x_title, y_title, figsize=(12, 5)):
+    """Renders a (rows x columns) frame as a heatmap with columns on the y axis."""
+    def draw(fig, ax):
+        image = ax.imshow(frame.T.to_numpy(), aspect='auto', cmap='viridis', interpolation='nearest',
+                          extent=[frame.index[0], frame.index[-1], frame.columns[-1] + 0.5, frame.columns[0] - 0.5])
+        ax.set_xlabel(x_title)
+        ax.set_ylabel(y_title)
+        fig.colorbar(image, ax=ax)
+    return render_figure(draw, figsize)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+
+import numpy as np
+
+from lotofacil_store import NUM_DEZENAS, EVEN_MASK, PRIME_MASK, encode_draws, popcount
+
+NUM_TO_PICK = 15
+NUM_COMBINATIONS = comb(NUM_DEZENAS, NUM_TO_PICK)  # 3.268.760
+DEFAULT_TABLE_PATH = 'lotofacil_combinations.npy'
+
+TABLE_DTYPE = np.dtype([
+    ('mask', '<u4'),
+    ('soma', '<u2'),
+    ('pares', 'u1'),
+    ('primos', 'u1'),
+    ('melhor_acerto', 'u1'),
+    ('sorteios', '<u2'),
+])
+
+# BINOM[n, k] = C(n, k) para n < 25 e k <= 15
+BINOM = np.array([[comb(n, k) for k in range(NUM_TO_PICK + 1)] for n in range(NUM_DEZENAS)], dtype=np.int64)
+_BITS = np.arange(NUM_DEZENAS, dtype=np.uint32)
+_CHUNK = 1 << 16
+# Teto do temporário (combinações x sorteios) de best_hits, independente do histórico
+_BLOCK_BYTES = 32 << 20
+
+
+# --- Combinatorial Number System ---
+# O rank de {c1 < c2 < ... < c15} (posições 0-24) é sum(C(ci, i)). Ele coincide
+# com a ordem numérica das máscaras, então a tabela fica ordenada por máscara.
+
+def rank_masks(masks):
+    """Returns the rank (0 .. C(25,15)-1) of each 15-number mask."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    ranks = np.zeros(masks.shape, dtype=np.int64)
+    for bit in range(NUM_DEZENAS):
+        present = (masks >> np.uint32(bit)) & np.uint32(1) == 1
+        below = popcount(masks & np.uint32((1 << bit) - 1)).astype(np.intp)
+        ranks += np.where(present, BINOM[bit, np.minimum(below + 1, NUM_TO_PICK)], 0)
+    return ranks
+
+
+def unrank(ranks):
+    """Returns the 15-number masks for the given ranks."""
+    ranks = np.array(ranks, dtype=np.int64)
+    masks = np.zeros(ranks.shape, dtype=np.uint32)
+    for i in range(NUM_TO_PICK, 0, -1):
+        position = np.searchsorted(BINOM[:, i], ranks, side='right') - 1
+        ranks -= BINOM[position, i]
+        masks |= np.left_shift(np.uint32(1), position.astype(np.uint32))
+    return masks
+
+
+def rank_tickets(tickets):
+    """Returns the rank of each ticket in an (n, 15) array of numbers."""
+    return rank_masks(encode_draws(np.atleast_2d(tickets)))
+
+
+def all_combination_masks():
+    """Returns the masks of every 15-number combination, in rank order."""
+    masks = []
+    step = 1 << 20
+    for start in range(0, 1 << NUM_DEZENAS, step):
+        candidates = np.arange(start, start + step, dtype=np.uint32)
+        masks.append(candidates[popcount(candidates) == NUM_TO_PICK])
+    return np.concatenate(masks)
+
+
+def mask_sums(masks):
+    """Returns the sum of the numbers encoded in each mask."""
+    sums = np.zeros(len(masks), dtype=np.uint16)
+    for bit in range(NUM_DEZENAS):
+        sums += ((masks >> np.uint32(bit)) & np.uint32(1)).astype(np.uint16) * np.uint16(bit + 1)
+    return sums
+
+
+def combination_attributes(masks):
+    """Returns the sum, evens and primes of each combination mask."""
+    return {
+        'soma': mask_sums(masks),
+        'pares': popcount(masks & np.uint32(EVEN_MASK)),
+        'primos': popcount(masks & np.uint32(PRIME_MASK)),
+    }
+
+
+def best_hits(combination_masks, draw_masks):
+    """Returns the largest overlap of each combination with any of the draws.
+
+    The draws are folded in blocks into a running maximum, so the
+    temporary stays under ``_BLOCK_BYTES`` however long the history is.
+    """
+    best = np.zeros(len(combination_masks), dtype=np.uint8)
+    draw_masks = np.unique(np.asarray(draw_masks, dtype=np.uint32))
+    block = max(1, _BLOCK_BYTES // (_CHUNK * draw_masks.itemsize))
+    for start in range(0, len(combination_masks), _CHUNK):
+        chunk = combination_masks[start:start + _CHUNK, None]
+        chunk_best = best[start:start + _CHUNK]
+        for first in range(0, len(draw_masks), block):
+            np.maximum(chunk_best, popcount(chunk & draw_masks[first:first + block]).max(axis=1),
+                       out=chunk_best)
+    return best
+
+
+# --- On-disk Table ---
+
+def _metadata_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _fill_best_hits(args):
+    path, start, stop, draw_masks = args
+    table = np.load(path, mmap_mode='r+')
+    table['melhor_acerto'][start:stop] = np.maximum(
+        table['melhor_acerto'][start:stop], best_hits(table['mask'][start:stop], draw_masks))
+    table.flush()
+
+
+def _add_draws(path, draw_masks, workers):
+    """Updates best hits and draw counts of an existing table with new draws."""
+    bounds = np.linspace(0, NUM_COMBINATIONS, (workers or 1) * 4 + 1).astype(np.int64)
+    tasks = [(path, int(a), int(b), draw_masks) for a, b in zip(bounds[:-1], bounds[1:])]
+    if workers == 1 or len(draw_masks) < 64:
+        for task in tasks:
+            _fill_best_hits(task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_fill_best_hits, tasks))
+    table = np.load(path, mmap_mode='r+')
+    np.add.at(table['sorteios'], rank_masks(draw_masks), 1)
+    table.flush()
+
+
+def build_combination_table(store, path=DEFAULT_TABLE_PATH, workers=None):
+    """Creates the memory-mapped table of all C(25,15) combinations for a draw history.
+
+    Per combination it stores the mask, sum, evens, primes, the best hit
+    count against any past draw and how many times it was drawn. Row i
+    is the combination of rank i. The table is filled in a temporary file
+    and renamed into place; the metadata is written only after that.
+    """
+    masks = all_combination_masks()
+    tmp_path = path + '.tmp'
+    table = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=TABLE_DTYPE, shape=(NUM_COMBINATIONS,))
+    table['mask'] = masks
+    for name, values in combination_attributes(masks).items():
+        table[name] = values
+    table['melhor_acerto'] = 0
+    table['sorteios'] = 0
+    table.flush()
+    del table
+    _add_draws(tmp_path, store.masks, workers)
+    _remove_metadata(path)
+    os.replace(tmp_path, path)
+    _write_metadata(path, store)
+    return np.load(path, mmap_mode='r')
+
+
+def _write_metadata(path, store):
+    with open(_metadata_path(path), 'w', encoding='utf-8') as f:
+        json.dump({'n_draws': len(store), 'fingerprint': store.fingerprint()}, f)
+
+
+def _remove_metadata(path):
+    # Sem metadados a tabela é reconstruída: uma interrupção no meio da escrita
+    # nunca deixa metadados válidos apontando para uma tabela incompleta
+    if os.path.exists(_metadata_path(path)):
+        os.remove(_metadata_path(path))
+
+
+def load_combination_table(store, path=DEFAULT_TABLE_PATH, workers=None):
+    """Opens the table read-only, building it or ingesting new draws when needed.
+
+    If the table was built from a prefix of ``store`` only the new draws
+    are folded in; any other change to the history triggers a rebuild.
+    """
+    metadata = {}
+    if os.path.exists(path) and os.path.exists(_metadata_path(path)):
+        with open(_metadata_path(path), encoding='utf-8') as f:
+            metadata = json.load(f)
+    n_draws = metadata.get('n_draws', -1)
+    if n_draws < 0 or n_draws > len(store) or store[:n_draws].fingerprint() != metadata.get('fingerprint'):
+        return build_combination_table(store, path, workers)
+    if n_draws < len(store):
+        _remove_metadata(path)
+        _add_draws(path, store.masks[n_draws:], workers)
+        _write_metadata(path, store)
+    return np.load(path, mmap_mode='r')
+
+
+# --- Queries ---
+
+def lookup_tickets(table, tickets):
+    """Returns the table rows for an (n, 15) array of tickets (O(1) per ticket)."""
+    return table[rank_tickets(tickets)]
+
+
+def was_drawn(table, tickets):
+    """Returns, for each ticket, whether it has ever been drawn."""
+    return lookup_tickets(table, tickets)['sorteios'] > 0
+
+
+def count_draws_with_hits(store, ticket, min_hits=11):
+    """Counts past draws sharing at least ``min_hits`` numbers with a ticket."""
+    ticket_mask = encode_draws(np.atleast_2d(ticket))[0]
+    return int((popcount(store.masks & ticket_mask) >= min_hits).sum())
+
+
+if __name__ == '__main__':
+    import time
+    from lotofacil_data import load_store
+    from lotofacil_generators import generate_batch
+
+    store_main = load_store()
+    start = time.perf_counter()
+    table_main = load_combination_table(store_main)
+    print(f"Tabela com {len(table_main)} combinações pronta em {time.perf_counter() - start:.1f} s")
+
+    tickets_main = generate_batch('random', 5, seed=1)
+    for ticket, row in zip(tickets_main, lookup_tickets(table_main, tickets_main)):
+        print(f"{ticket.tolist()}: soma={row['soma']} pares={row['pares']} primos={row['primos']} "
+              f"melhor acerto={row['melhor_acerto']} sorteado={row['sorteios']}x "
+              f"sorteios com 11+: {count_draws_with_hits(store_main, ticket)}")
+    never_above_12 = table_main['melhor_acerto'] <= 12
+    print(f"Combinações que nunca fizeram mais de 12 pontos: {int(never_above_12.sum())}")
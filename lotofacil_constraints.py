@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from lotofacil_combinations import DEFAULT_TABLE_PATH, all_combination_masks, combination_attributes
+from lotofacil_store import NUM_DEZENAS, numbers_to_mask, popcount, masks_to_incidence
+
+# Volante 5x5: linha r tem as dezenas 5r+1..5r+5, coluna c as dezenas c+1, c+6, ...
+ROW_MASKS = [numbers_to_mask(range(5 * r + 1, 5 * r + 6)) for r in range(5)]
+COL_MASKS = [numbers_to_mask(range(c + 1, NUM_DEZENAS + 1, 5)) for c in range(5)]
+
+
+# --- Combination Space ---
+
+@lru_cache(maxsize=1)
+def combination_space(table_path=DEFAULT_TABLE_PATH):
+    """Returns the masks and per-ticket attributes of all C(25,15) combinations.
+
+    Masks, sums, evens and primes are read from the memory-mapped table of
+    lotofacil_combinations when it exists, so both engines share one
+    source; without it they are computed with the same helpers. Loaded
+    once per process and shared by every query.
+    """
+    if os.path.exists(table_path):
+        table = np.load(table_path, mmap_mode='r')
+        masks = np.ascontiguousarray(table['mask'])
+        space = {'mask': masks, 'soma': table['soma'], 'pares': table['pares'], 'primos': table['primos']}
+    else:
+        masks = all_combination_masks()
+        space = {'mask': masks, **combination_attributes(masks)}
+    space['linhas'] = np.stack([popcount(masks & np.uint32(m)) for m in ROW_MASKS])
+    space['colunas'] = np.stack([popcount(masks & np.uint32(m)) for m in COL_MASKS])
+    return space
+
+
+def _bounds(value):
+    """Accepts an exact value or a (min, max) pair, inclusive."""
+    if isinstance(value, (tuple, list)):
+        return value[0], value[1]
+    return value, value
+
+
+def apply_range(selection, values, value):
+    """Narrows a boolean selection to ``values`` matching an exact value or inclusive (min, max) pair."""
+    if value is None:
+        return selection
+    low, high = _bounds(value)
+    if low is not None:
+        selection &= values >= low
+    if high is not None:
+        selection &= values <= high
+    return selection
+
+
+def filter_combinations(evens=None, primes=None, repeats=None, last_draw=None, sum_range=None,
+                        rows=None, cols=None, include=None, exclude=None):
+    """Returns a boolean selection over the combination space for combined constraints.
+
+    ``evens``, ``primes``, ``repeats`` (numbers shared with ``last_draw``) and
+    ``sum_range`` take an exact value or an inclusive ``(min, max)`` pair;
+    ``rows`` and ``cols`` take five such entries (or ``None``) for the 5x5
+    grid; ``include``/``exclude`` are numbers that must / must not appear.
+    """
+    space = combination_space()
+    masks = space['mask']
+    selection = np.ones(len(masks), dtype=bool)
+    selection = apply_range(selection, space['pares'], evens)
+    selection = apply_range(selection, space['primos'], primes)
+    selection = apply_range(selection, space['soma'], sum_range)
+    if repeats is not None:
+        if last_draw is None:
+            raise ValueError("Informe o último sorteio para restringir as repetições.")
+        last_mask = np.uint32(numbers_to_mask(last_draw))
+        selection = apply_range(selection, popcount(masks & last_mask), repeats)
+    for name, limits in (('linhas', rows), ('colunas', cols)):
+        if limits is None:
+            continue
+        if len(limits) != 5:
+            raise ValueError(f"Restrição de {name} deve ter 5 posições.")
+        for i, value in enumerate(limits):
+            selection = apply_range(selection, space[name][i], value)
+    if include:
+        include_mask = np.uint32(numbers_to_mask(include))
+        selection &= (masks & include_mask) == include_mask
+    if exclude:
+        selection &= (masks & np.uint32(numbers_to_mask(exclude))) == 0
+    return selection
+
+
+def count_tickets(**constraints):
+    """Counts exactly how many tickets satisfy the constraints."""
+    return int(filter_combinations(**constraints).sum())
+
+
+def _ticket_log_weights(masks, weights):
+    """Log of the product of per-number weights; tickets with a zero-weight number get -inf."""
+    values = np.array([float(weights.get(n, 0)) for n in range(1, NUM_DEZENAS + 1)])
+    if not np.all(values >= 0):
+        raise ValueError("Os pesos das dezenas devem ser números não negativos.")
+    with np.errstate(divide='ignore'):
+        log_weights = np.log(values)
+    total = np.zeros(len(masks), dtype=np.float64)
+    for bit in range(NUM_DEZENAS):
+        present = (masks >> np.uint32(bit)) & np.uint32(1) == 1
+        total[present] += log_weights[bit]
+    return total
+
+
+def sample_tickets(n, seed=None, weights=None, unique=False, **constraints):
+    """Samples n tickets from the exact set of tickets satisfying the constraints.
+
+    Sampling is uniform over that set, or proportional to the product of
+    per-number ``weights`` (e.g. frequencies or shifted delays) when given.
+    Numbers missing from ``weights`` or weighted 0 are never drawn; a
+    required (``include``) number without weight is an error. With
+    ``unique=True`` no ticket repeats. Returns an (n, 15) uint8 array.
+    """
+    if weights is not None:
+        unweighted = [n for n in constraints.get('include') or () if not weights.get(n, 0) > 0]
+        if unweighted:
+            raise ValueError(f"Dezenas obrigatórias sem peso positivo: {sorted(unweighted)}.")
+    candidates = combination_space()['mask'][filter_combinations(**constraints)]
+    if len(candidates) == 0:
+        raise ValueError("Nenhum jogo satisfaz todas as restrições.")
+    p = None
+    if weights is not None:
+        log_weights = _ticket_log_weights(candidates, weights)
+        weighted = np.isfinite(log_weights)
+        if not weighted.any():
+            raise ValueError("Nenhum jogo que satisfaz as restrições tem só dezenas com peso positivo.")
+        candidates, log_weights = candidates[weighted], log_weights[weighted]
+        p = np.exp(log_weights - log_weights.max())
+        p /= p.sum()
+    if unique and n > len(candidates):
+        raise ValueError(f"Apenas {len(candidates)} jogos satisfazem as restrições, solicitados {n} distintos.")
+    rng = np.random.default_rng(seed)
+    chosen = candidates[rng.choice(len(candidates), size=n, replace=not unique, p=p)]
+    return (np.nonzero(masks_to_incidence(chosen))[1].reshape(n, -1) + 1).astype(np.uint8)
+
+
+if __name__ == '__main__':
+    import time
+    from lotofacil_data import load_data
+
+    df_main, dezenas_cols_main = load_data()
+    last = df_main[dezenas_cols_main].iloc[-1].tolist()
+    combination_space()
+    constraints = {'evens': 7, 'primes': 5, 'repeats': 9, 'last_draw': last, 'sum_range': (180, 210)}
+    start = time.perf_counter()
+    total = count_tickets(**constraints)
+    tickets = sample_tickets(5, seed=42, **constraints)
+    print(f"{total} jogos satisfazem {constraints} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    for ticket in tickets:
+        print(ticket.tolist())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+from lotofacil_store import NUM_DEZENAS, numbers_to_mask
+
+# Acima deste tamanho o tensor denso (25**k) deixa de caber confortavelmente em memória
+MAX_DENSE_K = 4
+CHUNK_ROWS = 8192
+_CACHE_SIZE = 8
+
+_subset_cache = OrderedDict()
+
+
+def combination_index(k):
+    """Returns the (C(25, k), k) array of 0-based number indices in lexicographic order."""
+    return np.array(list(itertools.combinations(range(25), k)), dtype=np.intp).reshape(-1, k)
+
+
+def _outer_features(chunk, m):
+    """Returns the (n, 25**m) matrix of m-fold products of incidence columns."""
+    features = chunk
+    for _ in range(m - 1):
+        features = np.einsum('na,nb->nab', features, chunk).reshape(len(chunk), -1)
+    return features
+
+
+def cooccurrence_tensor(incidence, k):
+    """Counts how many draws contain each k-tuple of numbers, as a dense 25**k tensor.
+
+    Built from the (N, 25) incidence matrix in row chunks: the k-fold
+    product is split into two batched einsum outer products whose matmul
+    gives the tensor, so k=2 is the pair matrix ``X.T @ X`` and k=3 the
+    triple tensor. Entries with repeated indices count lower-order subsets.
+    """
+    incidence = np.asarray(incidence)
+    left, right = (k + 1) // 2, k // 2
+    chunk_rows = max(256, CHUNK_ROWS * 625 // 25 ** left)
+    tensor = np.zeros((25 ** left, 25 ** right), dtype=np.float64)
+    for start in range(0, len(incidence), chunk_rows):
+        chunk = incidence[start:start + chunk_rows].astype(np.float64)
+        rhs = _outer_features(chunk, right) if right else np.ones((len(chunk), 1))
+        tensor += _outer_features(chunk, left).T @ rhs
+    return tensor.round().astype(np.int64).reshape((25,) * k)
+
+
+def pair_matrix(incidence):
+    """Returns the 25x25 pair co-occurrence matrix (X.T @ X)."""
+    return cooccurrence_tensor(incidence, 2)
+
+
+def triple_tensor(incidence):
+    """Returns the 25x25x25 triple co-occurrence tensor."""
+    return cooccurrence_tensor(incidence, 3)
+
+
+def tensor_subset_counts(tensor):
+    """Reads the counts of every strictly increasing k-subset from a dense tensor."""
+    index = combination_index(tensor.ndim)
+    return index, tensor[tuple(index.T)]
+
+
+def _mask_subset_counts(masks, k):
+    index = combination_index(k)
+    subset_masks = np.zeros(len(index), dtype=np.uint32)
+    for column in index.T:
+        subset_masks |= np.left_shift(np.uint32(1), column.astype(np.uint32))
+    counts = np.zeros(len(index), dtype=np.int64)
+    for start in range(0, len(masks), CHUNK_ROWS // 8):
+        chunk = masks[start:start + CHUNK_ROWS // 8, None]
+        counts += ((chunk & subset_masks) == subset_masks).sum(axis=0)
+    return index, counts
+
+
+def subset_counts(store, k):
+    """Returns ``(index, counts)`` for every k-subset of 1-25 over the store.
+
+    ``index`` holds 0-based number indices. Results are cached per store
+    fingerprint, so repeated top-k queries on the same history are free.
+    """
+    key = (store.fingerprint(), k)
+    if key in _subset_cache:
+        _subset_cache.move_to_end(key)
+        return _subset_cache[key]
+    if k <= MAX_DENSE_K:
+        result = tensor_subset_counts(cooccurrence_tensor(store.incidence, k))
+    else:
+        result = _mask_subset_counts(store.masks, k)
+    _subset_cache[key] = result
+    if len(_subset_cache) > _CACHE_SIZE:
+        _subset_cache.popitem(last=False)
+    return result
+
+
+def top_from_counts(index, counts, n=10):
+    """Returns the ``n`` largest counts as ``[((a, b, ...), count), ...]`` with 1-based numbers."""
+    order = np.argsort(-counts, kind='stable')[:n]
+    return [(tuple(int(x) + 1 for x in index[i]), int(counts[i])) for i in order]
+
+
+# --- Arbitrary Groups ---
+
+def subset_frequency(store, group):
+    """Counts the draws that contain every number of ``group`` (e.g. {1, 2, 3, 4, 5})."""
+    numbers = set(int(n) for n in group)
+    if not numbers or not numbers <= set(range(1, NUM_DEZENAS + 1)):
+        raise ValueError(f"Grupo inválido: {sorted(numbers)}. Use dezenas de 1 a {NUM_DEZENAS}.")
+    group_mask = np.uint32(numbers_to_mask(numbers))
+    return int(((store.masks & group_mask) == group_mask).sum())
+
+
+def _tid_bitsets(incidence):
+    """Packs each number's column of draws into a (25, words) uint64 bitset."""
+    packed = np.packbits(incidence.T.astype(bool), axis=1)
+    padded = np.zeros((packed.shape[0], -(-packed.shape[1] // 8) * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view(np.uint64)
+
+
+def _frequent_at(tids, k, min_support):
+    """Returns every k-subset with support >= min_support (Eclat over tid bitsets).
+
+    Level by level, each frequent itemset is extended only with larger
+    numbers and kept if the AND of its bitsets still has enough draws;
+    since supersets of an infrequent set are infrequent, nothing else
+    can reach the threshold. Itemsets are grown one smallest number at a
+    time to keep the bitsets in memory small.
+    """
+    supports = np.bitwise_count(tids).sum(axis=1, dtype=np.int64)
+    found_items, found_supports = [], []
+    for first in np.flatnonzero(supports >= min_support):
+        items, bitsets, level_supports = np.array([[first]]), tids[first:first + 1], supports[first:first + 1]
+        for _ in range(k - 1):
+            new_items, new_bitsets, new_supports = [], [], []
+            for j in range(items[:, -1].min() + 1, NUM_DEZENAS):
+                extendable = items[:, -1] < j
+                extended = bitsets[extendable] & tids[j]
+                extended_supports = np.bitwise_count(extended).sum(axis=1, dtype=np.int64)
+                frequent = extended_supports >= min_support
+                new_items.append(np.column_stack([items[extendable][frequent], np.full(frequent.sum(), j)]))
+                new_bitsets.append(extended[frequent])
+                new_supports.append(extended_supports[frequent])
+            if not new_items:
+                items = np.empty((0, k), dtype=np.intp)
+                break
+            items, bitsets, level_supports = np.vstack(new_items), np.vstack(new_bitsets), np.concatenate(new_supports)
+            if len(items) == 0:
+                break
+        if len(items):
+            found_items.append(items)
+            found_supports.append(level_supports)
+    if not found_items:
+        return np.empty((0, k), dtype=np.intp), np.empty(0, dtype=np.int64)
+    return np.vstack(found_items), np.concatenate(found_supports)
+
+
+def frequent_subsets(store, k, n=10):
+    """Returns the ``n`` most frequent k-subsets without enumerating all C(25, k).
+
+    Starts from a support threshold above the expected count of a
+    k-subset and lowers it until at least ``n`` subsets reach it; the
+    result is then exact, ties included. Practical up to k=7 or so on
+    the full history. Same format and tie order as ``top_subsets``.
+    """
+    key = (store.fingerprint(), 'frequentes', k, n)
+    if key in _subset_cache:
+        _subset_cache.move_to_end(key)
+        return _subset_cache[key]
+    tids = _tid_bitsets(store.incidence)
+    # Suporte esperado de um k-subconjunto: N x C(25-k, 15-k) / C(25, 15)
+    expected = len(store) * np.prod([(15 - i) / (25 - i) for i in range(k)])
+    min_support = max(1, int(expected * 1.5))
+    while True:
+        items, supports = _frequent_at(tids, k, min_support)
+        if len(items) >= n or min_support == 1:
+            break
+        min_support = max(1, int(min_support * 0.8))
+    order = np.lexsort(items.T[::-1])
+    items, supports = items[order], supports[order]
+    result = top_from_counts(items, supports, n)
+    _subset_cache[key] = result
+    if len(_subset_cache) > _CACHE_SIZE:
+        _subset_cache.popitem(last=False)
+    return result
+
+
+def top_subsets(store, k, n=10):
+    """Returns the ``n`` most frequent k-subsets of numbers in the store."""
+    if k > MAX_DENSE_K:
+        return frequent_subsets(store, k, n)
+    index, counts = subset_counts(store, k)
+    return top_from_counts(index, counts, n)
+
+
+def clear_cache():
+    """Drops the cached subset counts (e.g. to time a cold computation)."""
+    _subset_cache.clear()
+
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+import numpy as np
 import pandas as pd
 from collections import Counter
 import random
 
+from lotofacil_data import load_data
+from lotofacil_store import DrawStore
+
 # --- Helper for Prime Numbers ---
 def is_prime(n):
     if n < 2:
@@ -17,91 +21,74 @@ PRIMES_UP_TO_25 = [n for n in range(1, 26) if is_prime(n)]
 NON_PRIMES_UP_TO_25 = [n for n in range(1, 26) if not is_prime(n)]
 
 # --- Analysis Functions ---
+# Todas as análises recebem o histórico como DrawStore (de load_store ou
+# cached_store) ou, por compatibilidade, como DataFrame, que é codificado a
+# cada chamada. Também aceitam ``rows``: uma seleção de linhas (array de
+# índices, fatia ou máscara booleana, ver lotofacil_query) que só fatia o
+# DrawStore, sem copiar nem recodificar o histórico.
+
+def as_store(draws, dezenas_cols):
+    """Returns ``draws`` when it is already a DrawStore, otherwise encodes the DataFrame."""
+    return draws if isinstance(draws, DrawStore) else DrawStore.from_frame(draws, dezenas_cols)
 
-def load_data(file_path=
-'lotofacil.csv'
-):
-    """Loads and preprocesses the Lotofácil data."""
-    df = pd.read_csv(file_path)
-    dezenas_cols = [f'Dezena{i}' for i in range(1, 16)]
-    df.dropna(subset=dezenas_cols, inplace=True)
-    for col in dezenas_cols:
-        df[col] = df[col].astype(int)
-    if 'Concurso' in df.columns:
-        df = df.sort_values(by='Concurso').reset_index(drop=True)
-    else: # Add a Concurso column if it doesn't exist, for consistency
-        df['Concurso'] = range(1, len(df) + 1)
-    return df, dezenas_cols
-
-def analyze_even_odd_per_draw(df, dezenas_cols):
+def _select(df, dezenas_cols, rows):
+    store = as_store(df, dezenas_cols)
+    return store if rows is None else store[rows]
+
+def analyze_even_odd_per_draw(df, dezenas_cols, rows=None):
     """Analyzes the distribution of even and odd numbers for each draw."""
-    results = []
-    for index, row in df.iterrows():
-        evens = 0
-        odds = 0
-        for col in dezenas_cols:
-            if row[col] % 2 == 0:
-                evens += 1
-            else:
-                odds += 1
-        results.append({'Concurso': row['Concurso'], 'Pares': evens, 'Ímpares': odds})
-    return pd.DataFrame(results)
-
-def analyze_primes_per_draw(df, dezenas_cols):
+    store = _select(df, dezenas_cols, rows)
+    evens = store.even_counts().astype('int64')
+    return pd.DataFrame({
+        'Concurso': store.concursos.astype('int64'),
+        'Pares': evens,
+        'Ímpares': len(dezenas_cols) - evens,
+    })
+
+def analyze_primes_per_draw(df, dezenas_cols, rows=None):
     """Analyzes the distribution of prime numbers for each draw."""
-    results = []
-    for index, row in df.iterrows():
-        primes_count = 0
-        for col in dezenas_cols:
-            if is_prime(row[col]):
-                primes_count += 1
-        results.append({'Concurso': row['Concurso'], 'Primos': primes_count})
-    return pd.DataFrame(results)
-
-def analyze_number_frequency(df, dezenas_cols):
+    store = _select(df, dezenas_cols, rows)
+    return pd.DataFrame({
+        'Concurso': store.concursos.astype('int64'),
+        'Primos': store.prime_counts().astype('int64'),
+    })
+
+def analyze_number_frequency(df, dezenas_cols, rows=None):
     """Calculates the frequency of each number drawn."""
-    all_numbers = []
-    for col in dezenas_cols:
-        all_numbers.extend(df[col].tolist())
-    number_counts = Counter(all_numbers)
-    return number_counts
+    store = _select(df, dezenas_cols, rows)
+    counts = store.number_counts()
+    return Counter({number: int(counts[number - 1]) for number in range(1, 26) if counts[number - 1] > 0})
 
-def analyze_overdue_numbers(df, dezenas_cols, num_draws_to_consider=None):
+def analyze_overdue_numbers(df, dezenas_cols, num_draws_to_consider=None, rows=None):
     """Identifies how many draws ago each number was last seen."""
-    if num_draws_to_consider is None or num_draws_to_consider <= 0:
-        df_filtered = df
-    else:
-        df_filtered = df.tail(num_draws_to_consider)
+    store = _select(df, dezenas_cols, rows)
+    if num_draws_to_consider is not None and num_draws_to_consider > 0:
+        store = store[-num_draws_to_consider:]
 
-    last_seen_concurso_index = {}
-    for number in range(1, 26):
-        last_seen_concurso_index[number] = -len(df_filtered) 
+    # Números nunca vistos na janela ficam com o índice -len(janela)
+    last_seen_concurso_index = store.last_seen()
+    last_seen_concurso_index[last_seen_concurso_index < 0] = -len(store)
 
-    for i, row in df_filtered.iterrows():
-        relative_index = df_filtered.index.get_loc(i)
-        for col in dezenas_cols:
-            num = row[col]
-            last_seen_concurso_index[num] = relative_index
-    
-    max_relative_index_filtered = len(df_filtered) - 1
-    overdue_counts = {}
-    for number in range(1, 26):
-        overdue_counts[number] = max_relative_index_filtered - last_seen_concurso_index[number]
-            
-    return overdue_counts
-
-def analyze_repeated_numbers(df, dezenas_cols):
+    max_relative_index_filtered = len(store) - 1
+    overdue = max_relative_index_filtered - last_seen_concurso_index
+    return {number: int(overdue[number - 1]) for number in range(1, 26)}
+
+def analyze_repeated_numbers(df, dezenas_cols, rows=None):
     """Analyzes the number of repeated numbers from the previous draw."""
-    repeated_counts_list = []
-    if len(df) < 2:
+    store = as_store(df, dezenas_cols)
+    if len(store) < 2:
         return pd.DataFrame(columns=['Concurso', 'Repetidos'])
-        
-    for i in range(1, len(df)):
-        current_draw_numbers = set(df.iloc[i][dezenas_cols].values)
-        previous_draw_numbers = set(df.iloc[i-1][dezenas_cols].values)
-        repeated_count = len(current_draw_numbers.intersection(previous_draw_numbers))
-        repeated_counts_list.append({'Concurso': df.iloc[i]['Concurso'], 'Repetidos': repeated_count})
-    return pd.DataFrame(repeated_counts_list)
+    concursos = store.concursos[1:]
+    repeats = store.repeat_counts()
+    if rows is not None:
+        # Repetições sempre em relação ao concurso anterior, esteja ele na seleção ou não
+        selected = np.zeros(len(store), dtype=bool)
+        selected[rows] = True
+        concursos, repeats = concursos[selected[1:]], repeats[selected[1:]]
+    return pd.DataFrame({
+        'Concurso': concursos.astype('int64'),
+        'Repetidos': repeats.astype('int64'),
+    })
 
 # --- Generator Functions ---
 
@@ -202,31 +189,32 @@ def generate_numbers_repeated_based(df, dezenas_cols, num_to_repeat, num_to_pick
 
 if __name__ == '__main__':
     df_main, dezenas_cols_main = load_data()
+    store_main = as_store(df_main, dezenas_cols_main)
 
     print("--- Teste: Distribuição Pares/Ímpares por Sorteio (Primeiros 5) ---")
-    even_odd_df = analyze_even_odd_per_draw(df_main, dezenas_cols_main)
+    even_odd_df = analyze_even_odd_per_draw(store_main, dezenas_cols_main)
     print(even_odd_df.head())
 
     print("\n--- Teste: Distribuição de Primos por Sorteio (Primeiros 5) ---")
-    primes_df = analyze_primes_per_draw(df_main, dezenas_cols_main)
+    primes_df = analyze_primes_per_draw(store_main, dezenas_cols_main)
     print(primes_df.head())
     print(f"Contagem de primos disponíveis (1-25): {len(PRIMES_UP_TO_25)}")
     print(f"Primos: {PRIMES_UP_TO_25}")
 
     print("\n--- Teste: Frequência dos Números ---")
-    frequencies = analyze_number_frequency(df_main, dezenas_cols_main)
+    frequencies = analyze_number_frequency(store_main, dezenas_cols_main)
     print(sorted(frequencies.items()))
 
     print("\n--- Teste: Números Atrasados (Considerando últimos 100 sorteios) ---")
-    overdue = analyze_overdue_numbers(df_main, dezenas_cols_main, num_draws_to_consider=100)
+    overdue = analyze_overdue_numbers(store_main, dezenas_cols_main, num_draws_to_consider=100)
     print(f"Mais atrasados (top 5): {sorted(overdue.items(), key=lambda item: item[1], reverse=True)[:5]}")
     
     print("\n--- Teste: Números Atrasados (Considerando todos os sorteios) ---")
-    overdue_all = analyze_overdue_numbers(df_main, dezenas_cols_main)
+    overdue_all = analyze_overdue_numbers(store_main, dezenas_cols_main)
     print(f"Mais atrasados (todos, top 5): {sorted(overdue_all.items(), key=lambda item: item[1], reverse=True)[:5]}")
 
     print("\n--- Teste: Números Repetidos do Sorteio Anterior (Primeiros 5) ---")
-    repeated_df = analyze_repeated_numbers(df_main, dezenas_cols_main)
+    repeated_df = analyze_repeated_numbers(store_main, dezenas_cols_main)
     print(repeated_df.head())
     
     print("\n--- Testes Geradores ---")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from lotofacil_store import NUM_DEZENAS, encode_draws, popcount, DrawStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow o cache é desativado e o CSV é lido sempre
+    pa = None
+    pq = None
+
+DEFAULT_CSV_PATH = 'lotofacil.csv'
+DEZENAS_COLS = [f'Dezena{i}' for i in range(1, 16)]
+
+_META_MTIME = b'lotofacil.source_mtime_ns'
+_META_SIZE = b'lotofacil.source_size'
+_META_HASH = b'lotofacil.source_sha256'
+
+
+# --- Schema ---
+# Todas as análises recebem o mesmo formato: Concurso (int32) seguido de
+# Dezena1..Dezena15 (uint8, 1-25, sem repetição no mesmo concurso), em
+# ordem crescente de concurso.
+
+def validate_draws(df):
+    """Checks that every row holds 15 distinct numbers between 1 and 25."""
+    values = df[DEZENAS_COLS].to_numpy()
+    out_of_range = ((values < 1) | (values > NUM_DEZENAS)).any(axis=1)
+    if out_of_range.any():
+        bad = df.loc[out_of_range, 'Concurso'].tolist()[:10] if 'Concurso' in df.columns else []
+        raise ValueError(f"Dezenas fora do intervalo 1-{NUM_DEZENAS} nos concursos: {bad}")
+    repeated = popcount(encode_draws(values)) != len(DEZENAS_COLS)
+    if repeated.any():
+        bad = df.loc[repeated, 'Concurso'].tolist()[:10] if 'Concurso' in df.columns else []
+        raise ValueError(f"Dezenas repetidas no mesmo sorteio nos concursos: {bad}")
+    return df
+
+
+# --- CSV Parsing ---
+
+def parse_csv(csv_path=DEFAULT_CSV_PATH):
+    """Parses the raw CSV into a typed frame: uint8 dezenas, int32 Concurso, sorted."""
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=DEZENAS_COLS)
+    df = df.astype({col: 'int64' for col in DEZENAS_COLS})
+    validate_draws(df)
+    df = df.astype({col: 'uint8' for col in DEZENAS_COLS})
+    if 'Concurso' in df.columns:
+        df['Concurso'] = df['Concurso'].astype('int32')
+        df = df.sort_values(by='Concurso', kind='stable')
+    else:  # Add a Concurso column if it doesn't exist, for consistency
+        df['Concurso'] = np.arange(1, len(df) + 1, dtype='int32')
+    return df[['Concurso'] + DEZENAS_COLS].reset_index(drop=True)
+
+
+# --- Parquet Cache ---
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_cache_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _read_cache_metadata(cache_path):
+    try:
+        return pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return {}
+
+
+def _write_cache(df, cache_path, stat, source_hash):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update({
+        _META_MTIME: str(stat.st_mtime_ns).encode(),
+        _META_SIZE: str(stat.st_size).encode(),
+        _META_HASH: source_hash.encode(),
+    })
+    tmp_path = cache_path + '.tmp'
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def read_draws(csv_path=DEFAULT_CSV_PATH, cache_path=None):
+    """Reads the draw history through a typed Parquet copy of the CSV.
+
+    The Parquet file is rebuilt only when the CSV changes: a matching
+    mtime and size reuse it directly, otherwise the CSV hash decides.
+    """
+    if pq is None:
+        return parse_csv(csv_path)
+    if cache_path is None:
+        cache_path = default_cache_path(csv_path)
+
+    stat = os.stat(csv_path)
+    metadata = _read_cache_metadata(cache_path) if os.path.exists(cache_path) else {}
+    if (metadata.get(_META_MTIME) == str(stat.st_mtime_ns).encode()
+            and metadata.get(_META_SIZE) == str(stat.st_size).encode()):
+        return pq.read_table(cache_path).to_pandas()
+
+    source_hash = _file_sha256(csv_path)
+    if metadata.get(_META_HASH) == source_hash.encode():
+        df = pq.read_table(cache_path).to_pandas()
+    else:
+        df = parse_csv(csv_path)
+    try:
+        _write_cache(df, cache_path, stat, source_hash)
+    except OSError:
+        pass  # Diretório somente leitura: segue sem cache
+    return df
+
+
+# --- Shared Loaders ---
+
+def load_data(file_path=DEFAULT_CSV_PATH):
+    """Loads the normalized draw history and the list of dezena columns."""
+    return read_draws(file_path), list(DEZENAS_COLS)
+
+
+def load_store(file_path=DEFAULT_CSV_PATH):
+    """Loads the normalized draw history directly as a DrawStore."""
+    return DrawStore.from_frame(read_draws(file_path), DEZENAS_COLS)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pandas as pd
+
+from lotofacil_store import FULL_MASK, NUM_DEZENAS, mask_to_numbers, masks_to_incidence
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class DelayTracker:
+    """Complete delay (gap) and cycle history, updated batch by batch.
+
+    A gap is the number of contests a number stayed out between two
+    appearances (0 when drawn in consecutive contests). A cycle closes
+    at the contest where all 25 numbers have appeared since it started.
+    Each ``ingest`` costs O(new rows x 25) with NumPy, plus one step per
+    cycle closed in the batch.
+    """
+
+    def __init__(self):
+        self.n_rows = 0
+        self.last_seen = np.full(NUM_DEZENAS, -1, dtype=np.int64)
+        self.first_seen = np.full(NUM_DEZENAS, -1, dtype=np.int64)
+        self.gap_histogram = np.zeros((NUM_DEZENAS, 1), dtype=np.int64)
+        self.cycles = np.empty((0, 2), dtype=np.int64)
+        self.cycle_start = 0
+        self.cycle_mask = 0
+
+    def ingest(self, masks):
+        """Adds a batch of draws (uint32 masks in contest order)."""
+        masks = np.asarray(masks, dtype=np.uint32)
+        if len(masks) == 0:
+            return self
+        incidence = masks_to_incidence(masks)
+        offset = self.n_rows
+
+        # Gaps: ocorrências ordenadas por dezena e depois por linha
+        numbers, rows = np.nonzero(incidence.T)
+        rows = rows + offset
+        first_in_batch = np.r_[True, numbers[1:] != numbers[:-1]]
+        previous = np.empty_like(rows)
+        previous[first_in_batch] = self.last_seen[numbers[first_in_batch]]
+        previous[~first_in_batch] = rows[np.flatnonzero(~first_in_batch) - 1]
+        has_previous = previous >= 0
+        gaps = rows[has_previous] - previous[has_previous] - 1
+        if len(gaps) and gaps.max() >= self.gap_histogram.shape[1]:
+            grown = np.zeros((NUM_DEZENAS, gaps.max() + 1), dtype=np.int64)
+            grown[:, :self.gap_histogram.shape[1]] = self.gap_histogram
+            self.gap_histogram = grown
+        np.add.at(self.gap_histogram, (numbers[has_previous], gaps), 1)
+
+        last_in_batch = np.r_[numbers[1:] != numbers[:-1], True]
+        self.last_seen[numbers[last_in_batch]] = rows[last_in_batch]
+        never_seen = self.first_seen[numbers[first_in_batch]] < 0
+        self.first_seen[numbers[first_in_batch][never_seen]] = rows[first_in_batch][never_seen]
+
+        self._ingest_cycles(masks, incidence, offset)
+        self.n_rows += len(masks)
+        return self
+
+    def _ingest_cycles(self, masks, incidence, offset):
+        n = len(incidence)
+        local_rows = np.arange(n)[:, None]
+        # next_seen[i, j]: primeira linha >= i do lote em que a dezena j aparece (n se nenhuma)
+        next_seen = np.minimum.accumulate(np.where(incidence.astype(bool), local_rows, n)[::-1], axis=0)[::-1]
+        start = 0
+        carry = self.cycle_mask
+        closed = []
+        while start < n:
+            missing = (carry >> np.arange(NUM_DEZENAS)) & 1 == 0
+            end = int(next_seen[start, missing].max()) if missing.any() else start
+            if end >= n:
+                break
+            closed.append((self.cycle_start, offset + end))
+            self.cycle_start = offset + end + 1
+            start = end + 1
+            carry = 0
+        if closed:
+            self.cycles = np.vstack([self.cycles, np.array(closed, dtype=np.int64)])
+        open_mask = int(np.bitwise_or.reduce(masks[start:])) if start < n else 0
+        self.cycle_mask = carry | open_mask
+
+    # --- Queries ---
+
+    def current_delays(self):
+        """Returns the contests since each number was last drawn (array of 25)."""
+        return np.where(self.last_seen >= 0, self.n_rows - 1 - self.last_seen, self.n_rows)
+
+    def gap_statistics(self, percentiles=DEFAULT_PERCENTILES):
+        """Returns a per-number table with appearances and gap max, mean and percentiles."""
+        histogram = self.gap_histogram
+        counts = histogram.sum(axis=1)
+        values = np.arange(histogram.shape[1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (histogram * values).sum(axis=1) / counts
+        maximum = np.where(counts > 0, histogram.shape[1] - 1 - np.argmax(histogram[:, ::-1] > 0, axis=1), 0)
+        cumulative = np.cumsum(histogram, axis=1)
+        stats = pd.DataFrame({
+            'Aparições': counts + (self.first_seen >= 0),
+            'AtrasoAtual': self.current_delays(),
+            'AtrasoMáximo': maximum,
+            'AtrasoMédio': mean,
+        }, index=pd.Index(range(1, NUM_DEZENAS + 1), name='Número'))
+        for q in percentiles:
+            # menor atraso g tal que pelo menos q% dos atrasos são <= g
+            target = np.ceil(counts * q / 100.0)
+            stats[f'P{q}'] = np.where(counts > 0, np.argmax(cumulative >= np.maximum(target, 1)[:, None], axis=1), 0)
+        return stats
+
+    def cycle_lengths(self):
+        """Returns the length (in contests) of each closed cycle."""
+        return self.cycles[:, 1] - self.cycles[:, 0] + 1
+
+    def missing_in_current_cycle(self):
+        """Returns the numbers not yet drawn in the open cycle."""
+        return mask_to_numbers(FULL_MASK & ~self.cycle_mask)
+
+
+def build_delay_tracker(store):
+    """Builds a tracker over the whole store in one batch."""
+    return DelayTracker().ingest(store.masks)
+
+
+def gap_sequences(store):
+    """Returns ``{number: gaps}`` with the full sequence of gaps of each number."""
+    numbers, rows = np.nonzero(store.incidence.T)
+    splits = np.flatnonzero(numbers[1:] != numbers[:-1]) + 1
+    by_number = dict(zip(numbers[np.r_[0, splits]] + 1, np.split(rows, splits))) if len(rows) else {}
+    return {n: np.diff(by_number[n]) - 1 if n in by_number else np.empty(0, dtype=np.int64)
+            for n in range(1, NUM_DEZENAS + 1)}
+
+
+def delays_at(store, concurso):
+    """Returns the delay of each number as of a past contest (inclusive)."""
+    row = int(np.searchsorted(store.concursos, concurso, side='right'))
+    if row == 0:
+        raise ValueError(f"Concurso {concurso} anterior ao início do histórico.")
+    history = store[:row]
+    last_seen = history.last_seen()
+    delays = np.where(last_seen >= 0, row - 1 - last_seen, row)
+    return {n: int(delays[n - 1]) for n in range(1, NUM_DEZENAS + 1)}
+
+
+if __name__ == '__main__':
+    from lotofacil_data import load_store
+
+    store_main = load_store()
+    tracker = build_delay_tracker(store_main)
+    print(tracker.gap_statistics().to_string())
+    lengths = tracker.cycle_lengths()
+    print(f"\n{len(lengths)} ciclos fechados, duração média {lengths.mean():.2f}, máxima {lengths.max()}")
+    print(f"Faltam no ciclo atual: {tracker.missing_in_current_cycle()}")
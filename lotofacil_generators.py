@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from lotofacil_core_analysis import PRIMES_UP_TO_25, NON_PRIMES_UP_TO_25
+
+ALL_NUMBERS = np.arange(1, 26)
+EVENS = ALL_NUMBERS[ALL_NUMBERS % 2 == 0]
+ODDS = ALL_NUMBERS[ALL_NUMBERS % 2 != 0]
+PRIMES = np.array(PRIMES_UP_TO_25)
+NON_PRIMES = np.array(NON_PRIMES_UP_TO_25)
+
+# Limita a memória temporária (n x 25 chaves float64) de lotes muito grandes
+BATCH_CHUNK = 1 << 18
+
+
+# --- Sampling Core ---
+
+def _top_k_keys(rng, n, population, weights, k):
+    """Samples k of ``population`` without replacement for n tickets at once.
+
+    Gumbel-top-k: adding Gumbel noise to log-weights and keeping the k
+    largest keys per row draws a weighted sample without replacement,
+    exactly like successive ``random.choices`` calls that skip repeats.
+    """
+    if k == 0:
+        return np.empty((n, 0), dtype=population.dtype)
+    if weights is None:
+        keys = rng.random((n, len(population)))
+    else:
+        keys = np.log(weights) + rng.gumbel(size=(n, len(population)))
+    if k < len(population):
+        keys = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    else:
+        keys = np.broadcast_to(np.arange(len(population)), (n, k))
+    return population[keys]
+
+
+def _sample_groups(rng, n, groups):
+    """Builds n sorted tickets taking k numbers from each (population, weights, k) group."""
+    tickets = np.empty((n, sum(k for _, _, k in groups)), dtype=np.uint8)
+    for start in range(0, n, BATCH_CHUNK):
+        size = min(BATCH_CHUNK, n - start)
+        parts = [_top_k_keys(rng, size, population, weights, k) for population, weights, k in groups]
+        tickets[start:start + size] = np.sort(np.concatenate(parts, axis=1), axis=1)
+    return tickets
+
+
+# --- Strategy Groups ---
+
+def _frequency_groups(number_counts, num_to_pick):
+    population = np.array(list(number_counts.keys()))
+    weights = np.array(list(number_counts.values()), dtype=np.float64)
+    if len(population) < num_to_pick:
+        raise ValueError(f"Apenas {len(population)} números com frequência, são necessários {num_to_pick}.")
+    return [(population, weights, num_to_pick)]
+
+
+def _even_odd_groups(num_evens, num_odds, num_to_pick):
+    if num_evens + num_odds != num_to_pick:
+        raise ValueError(f"A soma de números pares ({num_evens}) e ímpares ({num_odds}) deve ser {num_to_pick}.")
+    if not 0 <= num_evens <= len(EVENS) or not 0 <= num_odds <= len(ODDS):
+        raise ValueError("Solicitação de pares/ímpares excede a quantidade disponível.")
+    return [(EVENS, None, num_evens), (ODDS, None, num_odds)]
+
+
+def _prime_groups(num_primes_desired, num_to_pick):
+    num_non_primes_desired = num_to_pick - num_primes_desired
+    if num_primes_desired < 0 or num_non_primes_desired < 0:
+        raise ValueError("Quantidade de números primos ou não primos não pode ser negativa.")
+    if num_primes_desired > len(PRIMES):
+        raise ValueError(f"Solicitado {num_primes_desired} primos, mas apenas {len(PRIMES)} estão disponíveis.")
+    if num_non_primes_desired > len(NON_PRIMES):
+        raise ValueError(f"Solicitado {num_non_primes_desired} não primos, mas apenas {len(NON_PRIMES)} estão disponíveis.")
+    return [(PRIMES, None, num_primes_desired), (NON_PRIMES, None, num_non_primes_desired)]
+
+
+def _overdue_groups(overdue_counts, num_to_pick, top_n_overdue=None):
+    sorted_overdue = sorted(overdue_counts.items(), key=lambda item: item[1], reverse=True)
+    population = np.array([item[0] for item in sorted_overdue])
+    if top_n_overdue and top_n_overdue >= num_to_pick:
+        return [(population[:top_n_overdue], None, num_to_pick)]
+    weights = np.array([item[1] for item in sorted_overdue], dtype=np.float64)
+    if weights.min() <= 0:
+        weights = weights - weights.min() + 1
+    return [(population, weights, num_to_pick)]
+
+
+def _repeated_groups(last_draw_numbers, num_to_repeat, num_to_pick):
+    last_draw = np.array(sorted(int(n) for n in last_draw_numbers))
+    if len(last_draw) == 0:
+        raise ValueError("Não há dados de sorteios para obter o último sorteio.")
+    not_in_last_draw = np.setdiff1d(ALL_NUMBERS, last_draw)
+    if num_to_repeat > len(last_draw) or num_to_repeat < 0:
+        raise ValueError("Número de dezenas a repetir é inválido.")
+    if (num_to_pick - num_to_repeat) > len(not_in_last_draw) or (num_to_pick - num_to_repeat) < 0:
+        raise ValueError("Não há dezenas novas suficientes para completar o jogo.")
+    return [(last_draw, None, num_to_repeat), (not_in_last_draw, None, num_to_pick - num_to_repeat)]
+
+
+STRATEGIES = {
+    'random': lambda num_to_pick: [(ALL_NUMBERS, None, num_to_pick)],
+    'frequency': _frequency_groups,
+    'even_odd': _even_odd_groups,
+    'prime': _prime_groups,
+    'overdue': _overdue_groups,
+    'repeated': _repeated_groups,
+}
+
+
+def generate_batch(strategy, n, seed=None, num_to_pick=15, **params):
+    """Generates n tickets at once with one of the ``generate_numbers_*`` strategies.
+
+    Returns an (n, num_to_pick) uint8 array with each row sorted. Strategy
+    parameters follow the single-ticket generators:
+
+    - ``'frequency'``: ``number_counts``
+    - ``'even_odd'``: ``num_evens``, ``num_odds``
+    - ``'prime'``: ``num_primes_desired``
+    - ``'overdue'``: ``overdue_counts``, optional ``top_n_overdue``
+    - ``'repeated'``: ``last_draw_numbers``, ``num_to_repeat``
+    - ``'random'``: no parameters
+
+    The same ``seed`` always yields the same tickets.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}. Opções: {sorted(STRATEGIES)}")
+    groups = STRATEGIES[strategy](num_to_pick=num_to_pick, **params)
+    rng = np.random.default_rng(seed)
+    return _sample_groups(rng, int(n), groups)
+
+
+if __name__ == '__main__':
+    import time
+    from lotofacil_core_analysis import load_data, analyze_number_frequency, analyze_overdue_numbers
+
+    df_main, dezenas_cols_main = load_data()
+    params = {
+        'random': {},
+        'frequency': {'number_counts': analyze_number_frequency(df_main, dezenas_cols_main)},
+        'even_odd': {'num_evens': 7, 'num_odds': 8},
+        'prime': {'num_primes_desired': 5},
+        'overdue': {'overdue_counts': analyze_overdue_numbers(df_main, dezenas_cols_main, 100)},
+        'repeated': {'last_draw_numbers': df_main[dezenas_cols_main].iloc[-1], 'num_to_repeat': 9},
+    }
+    for strategy, strategy_params in params.items():
+        start = time.perf_counter()
+        tickets = generate_batch(strategy, 100_000, seed=42, **strategy_params)
+        elapsed = time.perf_counter() - start
+        print(f"{strategy:>10}: {len(tickets)} jogos em {elapsed * 1000:.1f} ms, primeiro: {tickets[0].tolist()}")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+
+from lotofacil_data import load_store
+from lotofacil_store import NUM_DEZENAS
+from lotofacil_windows import rolling_means, delay_as_of
+
+DEFAULT_LAGS = 3
+DEFAULT_WINDOWS = (10, 50)
+DEFAULT_MODELS_PATH = 'lotofacil_models.joblib'
+_CACHE_SIZE = 8
+
+_feature_cache = OrderedDict()
+
+
+# --- Features ---
+
+def build_features(store, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS):
+    """Builds the lag-feature matrix shared by the 25 per-number models.
+
+    Row t describes only contests before t: the incidence of the previous
+    ``lags`` draws, the delay of each number and its rolling frequency
+    over each window, all as of contest t-1. Returns ``{'X': (T, F)
+    float32 C-contiguous, 'y': (T, 25) uint8 targets, 'concursos': (T,),
+    'next': (F,) features for the upcoming contest, 'names': [F]}``,
+    where the first ``max(lags, max(windows))`` contests are left out.
+    Cached per store fingerprint and parameters.
+    """
+    windows = tuple(sorted(set(int(w) for w in windows)))
+    key = (store.fingerprint(), lags, windows)
+    if key in _feature_cache:
+        _feature_cache.move_to_end(key)
+        return _feature_cache[key]
+
+    incidence = store.incidence
+    warmup = max(lags, max(windows, default=0))
+    if len(store) <= warmup:
+        raise ValueError(f"São necessários mais de {warmup} concursos para montar as features.")
+    # Linhas de histórico h = t - 1 para t em [warmup, N]; a última gera as features do próximo concurso
+    history = np.arange(warmup - 1, len(store))
+    names = [f'lag{lag}_d{n}' for lag in range(1, lags + 1) for n in range(1, NUM_DEZENAS + 1)]
+    names += [f'atraso_d{n}' for n in range(1, NUM_DEZENAS + 1)]
+    names += [f'freq{w}_d{n}' for w in windows for n in range(1, NUM_DEZENAS + 1)]
+
+    features = np.empty((len(history), len(names)), dtype=np.float32)
+    for lag in range(1, lags + 1):
+        features[:, (lag - 1) * NUM_DEZENAS:lag * NUM_DEZENAS] = incidence[history - lag + 1]
+    offset = lags * NUM_DEZENAS
+    features[:, offset:offset + NUM_DEZENAS] = delay_as_of(incidence)[history]
+    offset += NUM_DEZENAS
+    for w in windows:
+        features[:, offset:offset + NUM_DEZENAS] = rolling_means(incidence, w)[history]
+        offset += NUM_DEZENAS
+
+    result = {
+        'X': features[:-1],
+        'y': incidence[warmup:],
+        'concursos': store.concursos[warmup:],
+        'next': features[-1],
+        'names': names,
+    }
+    _feature_cache[key] = result
+    if len(_feature_cache) > _CACHE_SIZE:
+        _feature_cache.popitem(last=False)
+    return result
+
+
+# --- Models ---
+
+def _fit_one(X, y, n_estimators, seed, max_depth):
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed, max_depth=max_depth, n_jobs=1)
+    return model.fit(X, y)
+
+
+def train_models(X, y, n_jobs=-1, n_estimators=100, seed=42, max_depth=None):
+    """Fits one random forest per number (column of ``y``) in parallel with joblib.
+
+    Each forest is single-threaded and the 25 fits are spread over
+    ``n_jobs`` workers; joblib memory-maps ``X`` so every worker reads the
+    same feature matrix instead of a copy.
+    """
+    return Parallel(n_jobs=n_jobs)(
+        delayed(_fit_one)(X, y[:, j], n_estimators, seed, max_depth) for j in range(y.shape[1]))
+
+
+def predict_proba(models, X):
+    """Returns the (rows, 25) probability of each number being drawn."""
+    X = np.atleast_2d(X)
+    probabilities = np.zeros((len(X), len(models)), dtype=np.float64)
+    for j, model in enumerate(models):
+        # Uma dezena sempre (ou nunca) sorteada no treino tem uma única classe
+        if 1 in model.classes_:
+            probabilities[:, j] = model.predict_proba(X)[:, list(model.classes_).index(1)]
+    return probabilities
+
+
+def save_models(models, store, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, path=DEFAULT_MODELS_PATH):
+    """Persists the fitted models with the feature parameters and the history they were trained on."""
+    joblib.dump({'models': models, 'lags': lags, 'windows': tuple(windows),
+                 'n_draws': len(store), 'fingerprint': store.fingerprint()}, path)
+
+
+def load_models(path=DEFAULT_MODELS_PATH):
+    """Loads what ``save_models`` wrote (a dict with ``models`` and the feature parameters)."""
+    return joblib.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina um modelo por dezena e estima o próximo concurso.")
+    parser.add_argument('--csv', default='lotofacil.csv')
+    parser.add_argument('--output', default=DEFAULT_MODELS_PATH)
+    parser.add_argument('--lags', type=int, default=DEFAULT_LAGS, help="Sorteios anteriores usados como features")
+    parser.add_argument('--windows', type=int, nargs='+', default=list(DEFAULT_WINDOWS),
+                        help="Janelas das frequências móveis")
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    store = load_store(args.csv)
+    features = build_features(store, args.lags, args.windows)
+    start = time.perf_counter()
+    models = train_models(features['X'], features['y'], args.n_jobs, args.trees, args.seed)
+    print(f"{len(models)} modelos treinados em {time.perf_counter() - start:.1f} s "
+          f"({features['X'].shape[0]} concursos x {features['X'].shape[1]} features)")
+    save_models(models, store, args.lags, args.windows, args.output)
+    print(f"Modelos salvos em {args.output}")
+
+    probabilities = predict_proba(models, features['next'])[0]
+    ranking = np.argsort(-probabilities, kind='stable')
+    print("Probabilidade estimada para o próximo concurso:")
+    for j in ranking:
+        print(f"Dezena {j + 1:02d}: {probabilities[j]:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from lotofacil_constraints import apply_range
+from lotofacil_store import numbers_to_mask
+
+FILTERS = ('concursos', 'last_n', 'repeats', 'evens', 'primes', 'sum_range', 'include', 'exclude')
+
+
+def filter_draws(store, concursos=None, last_n=None, repeats=None, evens=None, primes=None, sum_range=None,
+                 include=None, exclude=None):
+    """Returns a boolean selection over the store rows for combined filters.
+
+    ``concursos``, ``repeats`` (numbers shared with the previous contest),
+    ``evens``, ``primes`` and ``sum_range`` take an exact value or an
+    inclusive ``(min, max)`` pair where either side may be ``None``
+    (e.g. ``repeats=(9, None)`` for 9 or more); ``last_n`` keeps only the
+    last n contests; ``include``/``exclude`` are numbers that must / must
+    not have been drawn. The first contest has no previous one, so it is
+    left out whenever ``repeats`` is given.
+    """
+    masks = store.masks
+    selection = np.ones(len(store), dtype=bool)
+    selection = apply_range(selection, store.concursos, concursos)
+    if last_n is not None:
+        selection[:max(len(store) - int(last_n), 0)] = False
+    if repeats is not None:
+        repeat_counts = np.full(len(store), -1, dtype=np.int64)
+        repeat_counts[1:] = store.repeat_counts()
+        selection &= repeat_counts >= 0
+        selection = apply_range(selection, repeat_counts, repeats)
+    selection = apply_range(selection, store.even_counts(), evens)
+    selection = apply_range(selection, store.prime_counts(), primes)
+    if sum_range is not None:
+        selection = apply_range(selection, store.incidence @ np.arange(1, 26, dtype=np.int64), sum_range)
+    if include:
+        include_mask = np.uint32(numbers_to_mask(include))
+        selection &= (masks & include_mask) == include_mask
+    if exclude:
+        selection &= (masks & np.uint32(numbers_to_mask(exclude))) == 0
+    return selection
+
+
+def select_rows(store, **filters):
+    """Resolves filters into the sorted array of selected row indices.
+
+    The result can be passed as ``rows`` to the analyses or used to take a
+    sub-store (``store[rows]``) without going through the DataFrame.
+    """
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise ValueError(f"Filtros desconhecidos: {sorted(unknown)}. Opções: {list(FILTERS)}")
+    return np.flatnonzero(filter_draws(store, **filters))
+
+
+def filters_key(filters):
+    """Returns a hashable, order-independent key for a filters dict (lists and sets become tuples)."""
+    def hashable(value):
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(value))
+        return tuple(value) if isinstance(value, list) else value
+    return tuple(sorted((name, hashable(value)) for name, value in filters.items() if value is not None))
+
+
+if __name__ == '__main__':
+    from lotofacil_core_analysis import analyze_number_frequency
+    from lotofacil_data import load_data
+    from lotofacil_store import DrawStore
+
+    df_main, dezenas_cols_main = load_data()
+    store_main = DrawStore.from_frame(df_main, dezenas_cols_main)
+    rows_main = select_rows(store_main, concursos=(2001, None), repeats=(9, None))
+    print(f"{len(rows_main)} sorteios após o concurso 2000 com 9 ou mais repetidos")
+    print(sorted(analyze_number_frequency(df_main, dezenas_cols_main, rows=rows_main).items()))
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy.stats import binomtest, hypergeom
+
+from lotofacil_data import load_store
+from lotofacil_store import NUM_DEZENAS
+
+NUM_TO_PICK = 15
+PRIME_INDEX = np.array([2, 3, 5, 7, 11, 13, 17, 19, 23]) - 1
+EVEN_INDEX = np.arange(1, NUM_DEZENAS, 2)
+MIN_EXPECTED = 5.0
+ALPHA = 0.05
+CHUNK_REPLICATES = 32
+
+
+# --- Synthetic Draws ---
+
+def random_incidence(rng, n_replicates, n_draws):
+    """Returns (n_replicates, n_draws, 25) uint8 incidence of uniform 15-of-25 draws."""
+    keys = rng.random((n_replicates, n_draws, NUM_DEZENAS))
+    # As 15 menores chaves de cada linha formam um sorteio uniforme sem reposição
+    kth = np.partition(keys, NUM_TO_PICK - 1, axis=2)[..., NUM_TO_PICK - 1:NUM_TO_PICK]
+    return (keys <= kth).astype(np.uint8)
+
+
+# --- Null Model ---
+
+def _sum_pmf():
+    """Exact distribution of the sum of a uniform 15-of-25 draw (dynamic programming over subsets)."""
+    max_sum = sum(range(NUM_DEZENAS - NUM_TO_PICK + 1, NUM_DEZENAS + 1))
+    # ways[k, s]: subconjuntos de k dezenas já consideradas com soma s
+    ways = np.zeros((NUM_TO_PICK + 1, max_sum + 1), dtype=np.float64)
+    ways[0, 0] = 1
+    for number in range(1, NUM_DEZENAS + 1):
+        ways[1:, number:] += ways[:-1, :-number].copy()
+    return ways[NUM_TO_PICK] / ways[NUM_TO_PICK].sum()
+
+
+def _pool(pmf, n_draws):
+    """Groups adjacent values so each group expects at least MIN_EXPECTED draws.
+
+    Returns the (values, groups) 0/1 matrix and the expected count per group.
+    """
+    group_of = np.empty(len(pmf), dtype=np.int64)
+    group, running = 0, 0.0
+    for value, p in enumerate(pmf):
+        group_of[value] = group
+        running += p * n_draws
+        if running >= MIN_EXPECTED:
+            group, running = group + 1, 0.0
+    if group > 0 and (group_of == group).any():
+        group_of[group_of == group] = group - 1  # a cauda que não fechou um grupo vai para o anterior
+    n_groups = group_of.max() + 1
+    matrix = np.zeros((len(pmf), n_groups))
+    matrix[np.arange(len(pmf)), group_of] = 1
+    return matrix, (pmf @ matrix) * n_draws
+
+
+@lru_cache(maxsize=8)
+def null_model(n_draws):
+    """Exact expected values of each statistic's cells for n_draws uniform draws."""
+    values = np.arange(NUM_TO_PICK + 1)
+    return {
+        'n_draws': n_draws,
+        'numero': n_draws * NUM_TO_PICK / NUM_DEZENAS,
+        'par': n_draws * NUM_TO_PICK * (NUM_TO_PICK - 1) / (NUM_DEZENAS * (NUM_DEZENAS - 1)),
+        'soma': _pool(_sum_pmf(), n_draws),
+        'paridade': _pool(hypergeom(NUM_DEZENAS, len(EVEN_INDEX), NUM_TO_PICK).pmf(values), n_draws),
+        'primos': _pool(hypergeom(NUM_DEZENAS, len(PRIME_INDEX), NUM_TO_PICK).pmf(values), n_draws),
+    }
+
+
+# --- Statistics ---
+# Cada estatística recebe a incidência (R, N, 25) de R históricos e devolve (R,)
+# valores; quanto maior, mais o histórico se afasta de sorteios uniformes.
+
+def _chi2(observed, expected):
+    return ((observed - expected) ** 2 / expected).sum(axis=-1)
+
+
+def _histogram(values, n_values):
+    """Per-replicate histogram of an (R, N) integer array."""
+    offsets = values + n_values * np.arange(len(values))[:, None]
+    return np.bincount(offsets.ravel(), minlength=len(values) * n_values).reshape(len(values), n_values)
+
+
+def _grouped_chi2(values, pooled):
+    matrix, expected = pooled
+    return _chi2(_histogram(values, len(matrix)) @ matrix, expected)
+
+
+def _uniformity_stat(incidence, null):
+    """Chi-square of each number's frequency against N x 15/25."""
+    return _chi2(incidence.sum(axis=1, dtype=np.int64), null['numero'])
+
+
+def _pair_stat(incidence, null):
+    """Chi-square of the 300 pair co-occurrence counts against their expected value."""
+    as_float = incidence.astype(np.float32)
+    pairs = np.matmul(as_float.transpose(0, 2, 1), as_float)
+    upper = np.triu_indices(NUM_DEZENAS, 1)
+    return _chi2(pairs[:, upper[0], upper[1]].astype(np.float64), null['par'])
+
+
+def _runs_stat(incidence, null):
+    """Sum over numbers of the squared Wald-Wolfowitz z-score of drawn/not-drawn runs.
+
+    Each run of absences is one delay, so too few runs means delays
+    cluster and too many means they alternate more than chance.
+    """
+    n = incidence.shape[1]
+    runs = 1 + (incidence[:, 1:] != incidence[:, :-1]).sum(axis=1, dtype=np.int64)
+    drawn = incidence.sum(axis=1, dtype=np.int64)
+    product = 2.0 * drawn * (n - drawn)
+    expected = 1 + product / n
+    variance = product * (product - n) / (n ** 2 * (n - 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(variance > 0, (runs - expected) / np.sqrt(variance), 0.0)
+    return (z ** 2).sum(axis=1)
+
+
+def _max_delay_stat(incidence, null):
+    """Longest delay (consecutive contests without a number) over all numbers."""
+    rows = np.arange(incidence.shape[1], dtype=np.int32)[None, :, None]
+    last_seen = np.maximum.accumulate(np.where(incidence.astype(bool), rows, -1), axis=1)
+    return (rows - last_seen).max(axis=(1, 2)).astype(np.float64)
+
+
+def _sum_stat(incidence, null):
+    """Chi-square of the per-draw sum histogram against its exact distribution."""
+    sums = incidence @ np.arange(1, NUM_DEZENAS + 1, dtype=np.int64)
+    return _grouped_chi2(sums, null['soma'])
+
+
+def _parity_stat(incidence, null):
+    """Chi-square of evens per draw against the hypergeometric distribution."""
+    return _grouped_chi2(incidence[..., EVEN_INDEX].sum(axis=2, dtype=np.int64), null['paridade'])
+
+
+def _prime_stat(incidence, null):
+    """Chi-square of primes per draw against the hypergeometric distribution."""
+    return _grouped_chi2(incidence[..., PRIME_INDEX].sum(axis=2, dtype=np.int64), null['primos'])
+
+
+TESTS = {
+    'uniformidade': _uniformity_stat,
+    'independencia_pares': _pair_stat,
+    'sequencias_atraso': _runs_stat,
+    'atraso_maximo': _max_delay_stat,
+    'soma': _sum_stat,
+    'paridade': _parity_stat,
+    'primos': _prime_stat,
+}
+
+
+def test_statistics(incidence, tests=None):
+    """Computes the statistics of (R, N, 25) histories; returns ``{test: (R,) array}``."""
+    incidence = np.asarray(incidence, dtype=np.uint8)
+    if incidence.ndim == 2:
+        incidence = incidence[None]
+    null = null_model(incidence.shape[1])
+    return {name: TESTS[name](incidence, null) for name in (tests or TESTS)}
+
+
+# --- Per-number Uniformity ---
+# O qui-quadrado agregado soma os desvios das 25 dezenas e pode diluir uma
+# dezena isolada muito fora do esperado; aqui cada uma é testada sozinha.
+
+def holm_adjust(p_values):
+    """Holm step-down adjusted p-values (controls the family-wise error rate)."""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    order = np.argsort(p_values)
+    steps = (len(p_values) - np.arange(len(p_values))) * p_values[order]
+    adjusted = np.empty_like(p_values)
+    adjusted[order] = np.minimum(np.maximum.accumulate(steps), 1.0)
+    return adjusted
+
+
+def number_uniformity(store, alpha=ALPHA):
+    """Exact two-sided binomial test of each number's frequency against N x 15/25.
+
+    Under uniform draws each number appears in a contest with probability
+    15/25, independently across contests. P-values are Holm-adjusted over
+    the 25 numbers; ``Rejeita`` marks numbers significant at ``alpha``
+    after the correction.
+    """
+    n_draws = len(store)
+    counts = store.incidence.sum(axis=0, dtype=np.int64)
+    p = NUM_TO_PICK / NUM_DEZENAS
+    p_values = np.array([binomtest(int(k), n_draws, p).pvalue if n_draws else 1.0 for k in counts])
+    adjusted = holm_adjust(p_values)
+    return pd.DataFrame({
+        'Frequencia': counts,
+        'Esperada': n_draws * p,
+        'PValor': p_values,
+        'PValorAjustado': adjusted,
+        'Rejeita': adjusted < alpha,
+    }, index=pd.RangeIndex(1, NUM_DEZENAS + 1, name='Número'))
+
+
+# --- Monte Carlo ---
+
+def _simulate_chunk(task):
+    seed_sequence, n_replicates, n_draws, tests = task
+    return test_statistics(random_incidence(np.random.default_rng(seed_sequence), n_replicates, n_draws), tests)
+
+
+def simulate_null(n_draws, n_replicates=1000, tests=None, seed=0, workers=None, chunk_replicates=CHUNK_REPLICATES):
+    """Simulates the statistics of n_replicates uniform histories of n_draws contests.
+
+    Replicates are generated and reduced chunk by chunk, so only
+    ``chunk_replicates`` histories are in memory per worker; chunks run
+    in a process pool of ``workers`` processes (``workers=1`` runs
+    in-process). Results depend only on ``seed`` and the chunk size.
+    """
+    tests = list(TESTS) if tests is None else list(tests)
+    unknown = set(tests) - set(TESTS)
+    if unknown:
+        raise ValueError(f"Testes desconhecidos: {sorted(unknown)}. Opções: {list(TESTS)}")
+    sizes = [min(chunk_replicates, n_replicates - start) for start in range(0, n_replicates, chunk_replicates)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(s, size, n_draws, tests) for s, size in zip(seeds, sizes)]
+    if workers == 1:
+        parts = list(map(_simulate_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_simulate_chunk, tasks))
+    return {name: np.concatenate([part[name] for part in parts]) for name in tests}
+
+
+def randomness_tests(store, n_replicates=1000, tests=None, seed=0, workers=None):
+    """Runs the test battery on the history with empirical Monte Carlo p-values.
+
+    The p-value is the share of simulated uniform histories (same number
+    of contests) whose statistic is at least the observed one, with the
+    usual +1 correction.
+    """
+    observed = test_statistics(store.incidence, tests)
+    simulated = simulate_null(len(store), n_replicates, list(observed), seed, workers)
+    records = []
+    for name, value in observed.items():
+        null = simulated[name]
+        records.append([name, float(value[0]), float(null.mean()), float(np.percentile(null, 95)),
+                        (1 + int((null >= value[0]).sum())) / (len(null) + 1)])
+    return pd.DataFrame(records, columns=['Teste', 'Estatistica', 'MediaNula', 'P95Nula', 'PValor']).set_index('Teste')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Testes de aleatoriedade com p-valores de Monte Carlo.")
+    parser.add_argument('--csv', default='lotofacil.csv')
+    parser.add_argument('--replicates', type=int, default=1000, help="Históricos simulados")
+    parser.add_argument('--tests', nargs='+', default=list(TESTS), choices=list(TESTS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    store = load_store(args.csv)
+    start = time.perf_counter()
+    results = randomness_tests(store, args.replicates, args.tests, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{args.replicates * len(store):,} sorteios simulados em {elapsed:.1f} s")
+    print(results.to_string(float_format='{:.4f}'.format))
+    print(f"\nUniformidade por dezena (binomial exata, correção de Holm, alfa {ALPHA}):")
+    print(number_uniformity(store).to_string(float_format='{:.4f}'.format))
+
+
+if __name__ == '__main__':
+    main()
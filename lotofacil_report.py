@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import html
+import importlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from scipy.stats import chisquare
+
+from lotofacil_charts import render_figure
+from lotofacil_cooccurrence import top_subsets
+from lotofacil_data import load_store
+from lotofacil_delays import build_delay_tracker
+from lotofacil_model import DEFAULT_LAGS, DEFAULT_WINDOWS, build_features
+from lotofacil_randomness import number_uniformity, randomness_tests
+from lotofacil_walkforward import summarize as summarize_folds, walk_forward
+from lotofacil_windows import rolling_window_stats
+
+DEFAULT_OUTPUT_DIR = 'relatorios'
+SUMMARY_JSON = 'summary.json'
+SUMMARY_HTML = 'summary.html'
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23)
+
+
+def _save_png(out_dir, filename, draw, figsize=(10, 6)):
+    with open(os.path.join(out_dir, filename), 'wb') as f:
+        f.write(render_figure(draw, figsize))
+    return filename
+
+
+# --- Stages ---
+# Cada estágio recebe o histórico, seus parâmetros e os resumos dos estágios
+# de que depende; grava seus PNGs em out_dir e devolve (resumo, arquivos).
+# O resumo precisa ser serializável em JSON.
+
+def _frequency_stage(store, params, deps, out_dir):
+    counts = store.number_counts()
+    numbers = np.arange(1, 26)
+
+    def draw(fig, ax):
+        ax.bar(numbers, counts)
+        ax.set_title('Frequência de cada dezena')
+        ax.set_xlabel('Número')
+        ax.set_ylabel('Frequência')
+        ax.set_xticks(numbers)
+
+    summary = {
+        'contagens': {int(n): int(c) for n, c in zip(numbers, counts)},
+        'media': float(counts.mean()),
+        'mediana': float(np.median(counts)),
+        'desvio_padrao': float(counts.std(ddof=1)),
+    }
+    return summary, [_save_png(out_dir, 'frequencia.png', draw)]
+
+
+def _primes_stage(store, params, deps, out_dir):
+    # Contagens do estágio 'frequencia' (chaves em texto após o JSON)
+    counts = deps['frequencia']['contagens']
+    prime_count = sum(counts[str(number)] for number in PRIMES)
+    total = sum(counts.values())
+    nonprime_count = total - prime_count
+    expected = [total * len(PRIMES) / 25, total * (25 - len(PRIMES)) / 25]
+    chi2_stat, p_value = chisquare(f_obs=[prime_count, nonprime_count], f_exp=expected)
+
+    def draw(fig, ax):
+        ax.pie([prime_count, nonprime_count], labels=['primos', 'não primos'], autopct='%1.1f%%', startangle=90)
+        ax.set_title('Distribuição de Números Primos')
+        ax.axis('equal')
+
+    summary = {'primos': prime_count, 'nao_primos': nonprime_count,
+               'qui_quadrado': float(chi2_stat), 'p_valor': float(p_value)}
+    return summary, [_save_png(out_dir, 'primos_dist.png', draw, (6, 6))]
+
+
+def _subsets_stage(store, params, deps, out_dir):
+    top = top_subsets(store, params['k'], params['n'])
+    return {'top': [[list(subset), int(count)] for subset, count in top]}, []
+
+
+def _moving_average_stage(store, params, deps, out_dir):
+    window, dezena = params['janela'], params['dezena']
+    series = rolling_window_stats(store, (window,))[window]['frequencia'][dezena]
+
+    def draw(fig, ax):
+        ax.plot(series.index, series.to_numpy())
+        ax.set_title(f'Média Móvel ({window}) - Dezena {dezena}')
+        ax.set_xlabel('Concurso')
+        ax.set_ylabel('Probabilidade Estimada')
+
+    valid = series.dropna()
+    summary = {'janela': window, 'dezena': dezena, 'ultimo_valor': float(valid.iloc[-1]) if len(valid) else None,
+               'minimo': float(valid.min()) if len(valid) else None,
+               'maximo': float(valid.max()) if len(valid) else None}
+    return summary, [_save_png(out_dir, f'mm_dezena{dezena}.png', draw)]
+
+
+def _delays_stage(store, params, deps, out_dir):
+    tracker = build_delay_tracker(store)
+    delays = tracker.current_delays()
+    order = np.argsort(-delays, kind='stable')
+
+    def draw(fig, ax):
+        ax.bar([str(n + 1) for n in order], delays[order])
+        ax.set_title('Atraso em Número de Concursos desde Última Aparição')
+        ax.set_xlabel('Número')
+        ax.set_ylabel('Concursos de Atraso')
+
+    lengths = tracker.cycle_lengths()
+    summary = {
+        'atrasos': {int(n + 1): int(delays[n]) for n in order},
+        'atraso_maximo': {int(n): int(v) for n, v in tracker.gap_statistics()['AtrasoMáximo'].items()},
+        'ciclos_fechados': int(len(lengths)),
+        'duracao_media_ciclo': float(lengths.mean()) if len(lengths) else None,
+        'faltam_no_ciclo_atual': tracker.missing_in_current_cycle(),
+    }
+    return summary, [_save_png(out_dir, 'delay.png', draw)]
+
+
+def _model_stage(store, params, deps, out_dir):
+    # Avaliação walk-forward em ordem de concurso: cada fold só treina com concursos anteriores
+    dezena = params['dezena']
+    probabilities, metrics = walk_forward(store, [dezena], params['inicial'], params['passo'], model=params['modelo'],
+                                          n_jobs=1, seed=params['seed'], lags=params['lags'], windows=params['janelas'])
+    totals = summarize_folds(metrics).loc[dezena]
+    tested = metrics['Teste'].sum()
+    drawn = build_features(store, params['lags'], params['janelas'])['y'][-tested:, dezena - 1].mean()
+    summary = {'dezena': dezena, 'modelo': params['modelo'], 'folds': int(totals['Folds']),
+               'acuracia_walk_forward': float(totals['Acuracia']), 'log_loss': float(totals['LogLoss']),
+               'brier': float(totals['Brier']), 'acuracia_base': float(max(drawn, 1 - drawn))}
+    return summary, []
+
+
+def _randomness_stage(store, params, deps, out_dir):
+    results = randomness_tests(store, params['replicas'], seed=params['seed'], workers=1)
+    per_number = number_uniformity(store)
+    summary = {'replicas': params['replicas'], 'testes': results.to_dict(orient='index'),
+               'uniformidade_por_dezena': per_number.to_dict(orient='index'),
+               'dezenas_fora_do_uniforme': [int(n) for n in per_number.index[per_number['Rejeita']]]}
+    return summary, []
+
+
+def _highlights_stage(store, params, deps, out_dir):
+    counts = deps['frequencia']['contagens']
+    most, least = max(counts, key=counts.get), min(counts, key=counts.get)
+
+    def top_entry(stage):
+        top = deps[stage]['top']
+        return {'dezenas': top[0][0], 'vezes': top[0][1]} if top else None
+
+    model = deps['modelo']
+    summary = {
+        'mais_sorteada': {'dezena': int(most), 'vezes': counts[most]},
+        'menos_sorteada': {'dezena': int(least), 'vezes': counts[least]},
+        'par_mais_frequente': top_entry('pares'),
+        'trinca_mais_frequente': top_entry('trincas'),
+        'modelo': {'dezena': model['dezena'], 'acuracia_walk_forward': model['acuracia_walk_forward'],
+                   'ganho_sobre_base': model['acuracia_walk_forward'] - model['acuracia_base']},
+    }
+    return summary, []
+
+
+# nome: (função, dependências, parâmetros padrão)
+STAGES = {
+    'frequencia': (_frequency_stage, (), {}),
+    'primos': (_primes_stage, ('frequencia',), {}),
+    'pares': (_subsets_stage, (), {'k': 2, 'n': 10}),
+    'trincas': (_subsets_stage, (), {'k': 3, 'n': 10}),
+    'media_movel': (_moving_average_stage, (), {'janela': 50, 'dezena': 10}),
+    'atrasos': (_delays_stage, (), {}),
+    'aleatoriedade': (_randomness_stage, (), {'replicas': 1000, 'seed': 0}),
+    'modelo': (_model_stage, (), {'dezena': 10, 'modelo': 'sgd', 'inicial': 500, 'passo': 50, 'seed': 42,
+                                  'lags': DEFAULT_LAGS, 'janelas': list(DEFAULT_WINDOWS)}),
+    'destaques': (_highlights_stage, ('frequencia', 'pares', 'trincas', 'modelo'), {}),
+}
+
+# Módulos cujo código entra na impressão digital do estágio, além da própria
+# função: uma correção no motor invalida os resumos e PNGs já gravados.
+COMMON_ENGINES = ('lotofacil_store', 'lotofacil_charts')
+STAGE_ENGINES = {
+    'frequencia': (),
+    'primos': (),
+    'pares': ('lotofacil_cooccurrence',),
+    'trincas': ('lotofacil_cooccurrence',),
+    'media_movel': ('lotofacil_windows',),
+    'atrasos': ('lotofacil_delays',),
+    'aleatoriedade': ('lotofacil_randomness',),
+    'modelo': ('lotofacil_walkforward', 'lotofacil_model', 'lotofacil_windows'),
+    'destaques': (),
+}
+
+
+# --- Pipeline ---
+
+def _with_dependencies(names):
+    """Returns the requested stages plus everything they depend on, in topological order."""
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependência circular no estágio '{name}'.")
+        visiting.add(name)
+        for dep in STAGES[name][1]:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+@lru_cache(maxsize=None)
+def _code_version(name):
+    """Hash of the stage function's source and of the engine modules it runs on."""
+    digest = hashlib.blake2b(inspect.getsource(STAGES[name][0]).encode('utf-8'), digest_size=16)
+    for module in COMMON_ENGINES + STAGE_ENGINES.get(name, ()):
+        digest.update(inspect.getsource(importlib.import_module(module)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _stage_fingerprint(name, params, data_fingerprint, dep_fingerprints):
+    """Hashes everything a stage's output depends on: code, parameters, data and upstream stages."""
+    payload = json.dumps([name, _code_version(name), params, data_fingerprint, dep_fingerprints], sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _run_stage(task):
+    name, store, params, deps, out_dir = task
+    start = time.perf_counter()
+    summary, files = STAGES[name][0](store, params, deps, out_dir)
+    # Ida e volta em JSON para que resultados novos e em cache tenham os mesmos tipos
+    return name, json.loads(json.dumps(summary)), files, time.perf_counter() - start
+
+
+def _load_previous(out_dir):
+    path = os.path.join(out_dir, SUMMARY_JSON)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('estagios', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def run_report(store, out_dir=DEFAULT_OUTPUT_DIR, stages=None, params=None, workers=None, force=False):
+    """Runs the report stages as a DAG and writes PNGs, summary.json and summary.html to ``out_dir``.
+
+    A stage re-runs only when its fingerprint (code, parameters, draw
+    history and upstream fingerprints) differs from the one recorded in
+    the previous summary, or one of its files is missing; otherwise its
+    previous result is reused. Ready stages run in parallel in a process
+    pool of ``workers`` processes (``workers=1`` runs in-process).
+    """
+    names = list(STAGES) if stages is None else list(stages)
+    unknown = set(names) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Estágios desconhecidos: {sorted(unknown)}. Opções: {list(STAGES)}")
+    order = _with_dependencies(names)
+    stage_params = {name: {**STAGES[name][2], **(params or {}).get(name, {})} for name in order}
+    os.makedirs(out_dir, exist_ok=True)
+
+    data_fingerprint = store.fingerprint()
+    fingerprints = {}
+    for name in order:
+        fingerprints[name] = _stage_fingerprint(name, stage_params[name], data_fingerprint,
+                                                [fingerprints[dep] for dep in STAGES[name][1]])
+
+    previous = _load_previous(out_dir)
+    results = {}
+    for name in order:
+        entry = previous.get(name)
+        if (not force and entry and entry.get('fingerprint') == fingerprints[name]
+                and all(os.path.exists(os.path.join(out_dir, f)) for f in entry.get('arquivos', []))):
+            results[name] = {**entry, 'recalculado': False}
+    pending = [name for name in order if name not in results]
+
+    def ready():
+        return [name for name in pending if all(dep in results for dep in STAGES[name][1])]
+
+    def task(name):
+        deps = {dep: results[dep]['resumo'] for dep in STAGES[name][1]}
+        return name, store, stage_params[name], deps, out_dir
+
+    def record(outcome):
+        name, summary, files, elapsed = outcome
+        results[name] = {'fingerprint': fingerprints[name], 'parametros': stage_params[name], 'resumo': summary,
+                         'arquivos': files, 'tempo': elapsed, 'recalculado': True}
+
+    if workers == 1:
+        while pending:
+            name = ready()[0]
+            pending.remove(name)
+            record(_run_stage(task(name)))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = set()
+            while pending or running:
+                for name in ready():
+                    pending.remove(name)
+                    running.add(executor.submit(_run_stage, task(name)))
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+
+    report = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'sorteios': len(store),
+        'ultimo_concurso': int(store.concursos[-1]) if len(store) else None,
+        # Estágios fora desta execução continuam no resumo (e no cache) como estavam
+        'estagios': {name: results[name] if name in results else {**previous[name], 'recalculado': False}
+                     for name in STAGES if name in results or name in previous},
+    }
+    with open(os.path.join(out_dir, SUMMARY_JSON), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, SUMMARY_HTML), 'w', encoding='utf-8') as f:
+        f.write(_render_html(report))
+    return report
+
+
+# --- HTML Summary ---
+
+def _html_value(value):
+    if isinstance(value, dict):
+        rows = ''.join(f'<tr><th>{html.escape(str(k))}</th><td>{_html_value(v)}</td></tr>' for k, v in value.items())
+        return f'<table>{rows}</table>'
+    if isinstance(value, list) and value and isinstance(value[0], list):
+        rows = ''.join('<tr>' + ''.join(f'<td>{_html_value(v)}</td>' for v in item) + '</tr>' for item in value)
+        return f'<table>{rows}</table>'
+    if isinstance(value, float):
+        return f'{value:.4f}'
+    return html.escape(str(value))
+
+
+def _render_html(report):
+    sections = []
+    for name, result in report['estagios'].items():
+        images = ''.join(f'<img src="{html.escape(f)}" alt="{html.escape(f)}">' for f in result['arquivos'])
+        status = 'recalculado' if result['recalculado'] else 'em cache'
+        sections.append(f'<section><h2>{html.escape(name)} <small>({status}, {result["tempo"]:.2f} s)</small></h2>'
+                        f'{_html_value(result["resumo"])}{images}</section>')
+    return ('<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Relatório Lotofácil</title>'
+            '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin:.5em 0}'
+            'th,td{border:1px solid #ccc;padding:2px 8px;text-align:left}img{max-width:100%;display:block}</style>'
+            f'</head><body><h1>Relatório Lotofácil</h1><p>{report["sorteios"]} sorteios, último concurso '
+            f'{report["ultimo_concurso"]}, gerado em {report["gerado_em"]}.</p>{"".join(sections)}</body></html>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o relatório completo (PNGs, summary.json e summary.html).")
+    parser.add_argument('--csv', default='lotofacil.csv')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--window', type=int, default=50, help="Janela da média móvel")
+    parser.add_argument('--dezena', type=int, default=10, help="Dezena da média móvel e do modelo")
+    parser.add_argument('--force', action='store_true', help="Recalcula todos os estágios")
+    args = parser.parse_args()
+
+    params = {'media_movel': {'janela': args.window, 'dezena': args.dezena}, 'modelo': {'dezena': args.dezena}}
+    report = run_report(load_store(args.csv), args.output_dir, args.stages, params, args.workers, args.force)
+    for name, result in report['estagios'].items():
+        status = f"recalculado em {result['tempo']:.2f} s" if result['recalculado'] else "em cache"
+        print(f"{name}: {status}")
+    print(f"Relatório salvo em {os.path.join(args.output_dir, SUMMARY_HTML)}")
+
+
+if __name__ == '__main__':
+    main()
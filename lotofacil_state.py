@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import zipfile
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from lotofacil_store import DrawStore, popcount
+from lotofacil_cooccurrence import pair_matrix, triple_tensor, tensor_subset_counts, top_from_counts
+from lotofacil_delays import DelayTracker
+
+DEFAULT_STATE_PATH = 'lotofacil_state.npz'
+
+
+class AnalysisState:
+    """Running counters over the draw history, updated in O(new rows).
+
+    Holds what the full-history analyses need: number frequencies, the row
+    where each number was last seen, the previous draw (as a mask), the
+    per-draw repeat counts, the pair/triple co-occurrence counts and the
+    full gap/cycle history (``delays``). ``fingerprint`` identifies the
+    history prefix the counters were built from once the state is saved.
+    """
+
+    def __init__(self):
+        self.n_draws = 0
+        self.last_concurso = None
+        self.fingerprint = None
+        self.number_counts = np.zeros(25, dtype=np.int64)
+        self.last_seen = np.full(25, -1, dtype=np.int64)
+        self.previous_mask = None
+        self.repeat_concursos = []
+        self.repeat_counts = []
+        self.pair_counts = np.zeros((25, 25), dtype=np.int64)
+        self.triple_counts = np.zeros((25, 25, 25), dtype=np.int64)
+        self.delays = DelayTracker()
+
+    def ingest(self, new_rows, dezenas_cols=None):
+        """Adds new contests (in contest order) to the running counters."""
+        if dezenas_cols is None:
+            dezenas_cols = [f'Dezena{i}' for i in range(1, 16)]
+        if len(new_rows) == 0:
+            return self
+        store = DrawStore.from_frame(new_rows, dezenas_cols)
+        incidence = store.incidence.astype(np.int64)
+
+        self.number_counts += incidence.sum(axis=0)
+        present = store.last_seen()
+        self.last_seen = np.where(present >= 0, present + self.n_draws, self.last_seen)
+
+        masks = store.masks
+        if self.previous_mask is not None:
+            masks = np.concatenate(([np.uint32(self.previous_mask)], masks))
+            concursos = store.concursos
+        else:
+            concursos = store.concursos[1:]
+        self.repeat_concursos.extend(concursos.tolist())
+        self.repeat_counts.extend(popcount(masks[1:] & masks[:-1]).tolist())
+        self.previous_mask = int(store.masks[-1])
+
+        self.pair_counts += pair_matrix(incidence)
+        self.triple_counts += triple_tensor(incidence)
+        self.delays.ingest(store.masks)
+
+        self.n_draws += len(store)
+        self.last_concurso = int(store.concursos[-1])
+        return self
+
+    def update(self, df, dezenas_cols=None):
+        """Ingests the rows of ``df`` after the first ``n_draws`` (already counted).
+
+        New rows are picked by position, not by contest number, so a
+        contest repeated in the history is not dropped; ``load_state``
+        checks that those first rows are the ones the counters came from.
+        """
+        return self.ingest(df.iloc[self.n_draws:], dezenas_cols)
+
+    # --- Results in the same shape as the full-pass analyses ---
+
+    def number_frequency(self):
+        """Same result as ``analyze_number_frequency`` over the ingested draws."""
+        return Counter({number: int(self.number_counts[number - 1])
+                        for number in range(1, 26) if self.number_counts[number - 1] > 0})
+
+    def overdue_numbers(self):
+        """Same result as ``analyze_overdue_numbers`` over all ingested draws."""
+        last_seen = np.where(self.last_seen < 0, -self.n_draws, self.last_seen)
+        overdue = self.n_draws - 1 - last_seen
+        return {number: int(overdue[number - 1]) for number in range(1, 26)}
+
+    def repeated_numbers(self):
+        """Same result as ``analyze_repeated_numbers`` over the ingested draws."""
+        if not self.repeat_counts:
+            return pd.DataFrame(columns=['Concurso', 'Repetidos'])
+        return pd.DataFrame({
+            'Concurso': np.asarray(self.repeat_concursos, dtype='int64'),
+            'Repetidos': np.asarray(self.repeat_counts, dtype='int64'),
+        })
+
+    def top_pairs(self, n=10):
+        """Returns the ``n`` most frequent pairs as ``[((a, b), count), ...]``."""
+        return top_from_counts(*tensor_subset_counts(self.pair_counts), n)
+
+    def top_triples(self, n=10):
+        """Returns the ``n`` most frequent triples as ``[((a, b, c), count), ...]``."""
+        return top_from_counts(*tensor_subset_counts(self.triple_counts), n)
+
+    # --- Persistence ---
+
+    def save(self, path=DEFAULT_STATE_PATH, fingerprint=None):
+        """Saves the counters with the fingerprint of the ``n_draws`` rows they cover.
+
+        Writes to a temporary file in the same directory and renames it over
+        ``path``, so concurrent readers never see a partial file.
+        """
+        if fingerprint is not None:
+            self.fingerprint = fingerprint
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write(self, f):
+        np.savez_compressed(
+            f,
+            n_draws=self.n_draws,
+            fingerprint=np.array('' if self.fingerprint is None else self.fingerprint),
+            last_concurso=-1 if self.last_concurso is None else self.last_concurso,
+            number_counts=self.number_counts,
+            last_seen=self.last_seen,
+            previous_mask=-1 if self.previous_mask is None else self.previous_mask,
+            repeat_concursos=np.asarray(self.repeat_concursos, dtype=np.int64),
+            repeat_counts=np.asarray(self.repeat_counts, dtype=np.int64),
+            pair_counts=self.pair_counts,
+            triple_counts=self.triple_counts,
+            gap_histogram=self.delays.gap_histogram,
+            first_seen=self.delays.first_seen,
+            cycles=self.delays.cycles,
+            cycle_state=np.array([self.delays.cycle_start, self.delays.cycle_mask], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        state = cls()
+        with np.load(path) as data:
+            state.n_draws = int(data['n_draws'])
+            state.fingerprint = str(data['fingerprint']) or None
+            last_concurso = int(data['last_concurso'])
+            state.last_concurso = None if last_concurso < 0 else last_concurso
+            state.number_counts = data['number_counts']
+            state.last_seen = data['last_seen']
+            previous_mask = int(data['previous_mask'])
+            state.previous_mask = None if previous_mask < 0 else previous_mask
+            state.repeat_concursos = data['repeat_concursos'].tolist()
+            state.repeat_counts = data['repeat_counts'].tolist()
+            state.pair_counts = data['pair_counts']
+            state.triple_counts = data['triple_counts']
+            state.delays.n_rows = state.n_draws
+            state.delays.last_seen = state.last_seen.copy()
+            state.delays.first_seen = data['first_seen']
+            state.delays.gap_histogram = data['gap_histogram']
+            state.delays.cycles = data['cycles']
+            state.delays.cycle_start, state.delays.cycle_mask = (int(x) for x in data['cycle_state'])
+        return state
+
+
+def load_state(df, dezenas_cols, state_path=DEFAULT_STATE_PATH):
+    """Loads the persisted state, ingests the contests it has not seen and saves it back.
+
+    The saved counters are reused only if they were built from a prefix of
+    ``df``; any other change to the history (a corrected row, a replaced
+    CSV) rebuilds them from scratch.
+    """
+    store = DrawStore.from_frame(df, dezenas_cols)
+    state = AnalysisState()
+    if os.path.exists(state_path):
+        try:
+            state = AnalysisState.load(state_path)
+        except (KeyError, ValueError, OSError, EOFError, zipfile.BadZipFile):
+            pass  # Arquivo de uma versão anterior, vazio ou truncado: reconstrói do zero
+    if state.n_draws > len(store) or store[:state.n_draws].fingerprint() != state.fingerprint:
+        state = AnalysisState()
+    previous_draws = state.n_draws
+    state.update(df, dezenas_cols)
+    if state.n_draws != previous_draws or previous_draws == 0:
+        state.save(state_path, store.fingerprint())
+    return state
+
+
+if __name__ == '__main__':
+    from lotofacil_core_analysis import load_data
+
+    df_main, dezenas_cols_main = load_data()
+    state = load_state(df_main, dezenas_cols_main)
+    print(f"Estado com {state.n_draws} sorteios (último concurso: {state.last_concurso})")
+    print(f"Mais atrasados (top 5): {sorted(state.overdue_numbers().items(), key=lambda item: item[1], reverse=True)[:5]}")
+    print(f"Top 5 pares: {state.top_pairs(5)}")
+    print(f"Top 5 trincas: {state.top_triples(5)}")
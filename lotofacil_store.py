@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import hashlib
+
+import numpy as np
+
+# --- Bitset Helpers ---
+# Cada concurso é guardado como uma máscara de 25 bits: o bit (n - 1) indica
+# que a dezena n foi sorteada.
+
+NUM_DEZENAS = 25
+FULL_MASK = (1 << NUM_DEZENAS) - 1
+_BIT_SHIFTS = np.arange(NUM_DEZENAS, dtype=np.uint32)
+
+
+def numbers_to_mask(numbers):
+    """Encodes an iterable of numbers (1-25) as a 25-bit mask."""
+    mask = 0
+    for n in numbers:
+        mask |= 1 << (int(n) - 1)
+    return mask
+
+
+def mask_to_numbers(mask):
+    """Decodes a 25-bit mask into the sorted list of numbers it contains."""
+    mask = int(mask)
+    return [n for n in range(1, NUM_DEZENAS + 1) if mask >> (n - 1) & 1]
+
+
+EVEN_MASK = numbers_to_mask(range(2, NUM_DEZENAS + 1, 2))
+PRIME_MASK = numbers_to_mask([2, 3, 5, 7, 11, 13, 17, 19, 23])
+
+
+def popcount(masks):
+    """Counts the set bits of each mask."""
+    return np.bitwise_count(np.asarray(masks, dtype=np.uint32))
+
+
+def encode_draws(values):
+    """Encodes an (N, 15) array of numbers into an array of uint32 masks."""
+    values = np.asarray(values, dtype=np.uint32)
+    if values.size == 0:
+        return np.zeros(len(values), dtype=np.uint32)
+    bits = np.left_shift(np.uint32(1), values - np.uint32(1))
+    return np.bitwise_or.reduce(bits, axis=1).astype(np.uint32)
+
+
+def masks_to_incidence(masks):
+    """Expands uint32 masks into an (N, 25) 0/1 uint8 incidence matrix."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    return ((masks[:, None] >> _BIT_SHIFTS) & 1).astype(np.uint8)
+
+
+# --- Draw Store ---
+
+class DrawStore:
+    """Draw history kept as 25-bit masks plus the matching incidence matrix.
+
+    Rows follow contest order. Slicing a store (``store[-100:]``) returns a
+    new store whose arrays are views over the original ones.
+    """
+
+    def __init__(self, concursos, masks, incidence=None):
+        self.concursos = np.asarray(concursos, dtype=np.int32)
+        self.masks = np.asarray(masks, dtype=np.uint32)
+        if incidence is None:
+            incidence = masks_to_incidence(self.masks)
+        self.incidence = incidence
+
+    @classmethod
+    def from_frame(cls, df, dezenas_cols):
+        """Builds a store from a DataFrame with one column per drawn number."""
+        masks = encode_draws(df[dezenas_cols].to_numpy())
+        if 'Concurso' in df.columns:
+            concursos = df['Concurso'].to_numpy()
+        else:
+            concursos = np.arange(1, len(df) + 1)
+        return cls(concursos, masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __getitem__(self, key):
+        return DrawStore(self.concursos[key], self.masks[key], self.incidence[key])
+
+    def fingerprint(self):
+        """Returns a short hash of the contests and masks, used as a cache key."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.concursos.tobytes())
+        digest.update(self.masks.tobytes())
+        return digest.hexdigest()
+
+    def number_counts(self):
+        """Returns how many times each number (1-25) was drawn, as an array of 25."""
+        return self.incidence.sum(axis=0, dtype=np.int64)
+
+    def even_counts(self):
+        """Returns the amount of even numbers in each draw."""
+        return popcount(self.masks & np.uint32(EVEN_MASK))
+
+    def prime_counts(self):
+        """Returns the amount of prime numbers in each draw."""
+        return popcount(self.masks & np.uint32(PRIME_MASK))
+
+    def repeat_counts(self):
+        """Returns how many numbers each draw repeats from the previous one."""
+        return popcount(self.masks[1:] & self.masks[:-1])
+
+    def last_seen(self):
+        """Returns the row index where each number was last drawn (-1 if never)."""
+        if len(self) == 0:
+            return np.full(NUM_DEZENAS, -1, dtype=np.int64)
+        present = self.incidence[::-1].astype(bool)
+        last = len(self) - 1 - np.argmax(present, axis=0)
+        return np.where(present.any(axis=0), last, -1).astype(np.int64)
@@ -2,92 +2,62 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
 import random
 
 # Importar funções do script de análise principal
+from lotofacil_cache import cached_analysis, cached_load_data, cached_rows, warm_cache
+from lotofacil_charts import cached_chart, distribution_chart, number_bar_chart
 from lotofacil_core_analysis import (
-    load_data,
     analyze_even_odd_per_draw,
     analyze_primes_per_draw,
     analyze_number_frequency,
     analyze_overdue_numbers,
     analyze_repeated_numbers,
-    generate_numbers_frequency_based,
-    generate_numbers_even_odd_based,
-    generate_numbers_prime_based,
-    generate_numbers_overdue_based,
-    generate_numbers_repeated_based,
     PRIMES_UP_TO_25
 )
+from lotofacil_generators import generate_batch
+from lotofacil_constraints import count_tickets, sample_tickets
+from lotofacil_query import filters_key
 
 st.set_page_config(page_title="Lotofácil Dashboard", layout="wide")
 
 # --- Funções de Plotagem Adaptadas para Streamlit ---
-def plot_number_frequency_st(number_counts):
-    sorted_counts = sorted(number_counts.items(), key=lambda x: int(x[0]))
-    numbers = [item[0] for item in sorted_counts]
-    counts = [item[1] for item in sorted_counts]
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.barplot(x=numbers, y=counts, ax=ax, palette="viridis")
-    ax.set_title("Frequência dos Números na Lotofácil")
-    ax.set_xlabel("Número")
-    ax.set_ylabel("Frequência")
-    ax.tick_params(axis="x", rotation=90)
-    plt.tight_layout()
-    st.pyplot(fig)
-
-
-def plot_even_odd_distribution_st(df_even_odd):
-    count_data = df_even_odd["Pares"].value_counts().sort_index()
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=count_data.index, y=count_data.values, ax=ax, palette="coolwarm")
-    ax.set_title("Distribuição da Quantidade de Números Pares por Sorteio")
-    ax.set_xlabel("Quantidade de Números Pares no Sorteio")
-    ax.set_ylabel("Número de Sorteios")
-    plt.tight_layout()
-    st.pyplot(fig)
-
-
-def plot_primes_distribution_st(df_primes):
-    count_data = df_primes["Primos"].value_counts().sort_index()
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=count_data.index, y=count_data.values, ax=ax, palette="crest")
-    ax.set_title("Distribuição da Quantidade de Números Primos por Sorteio")
-    ax.set_xlabel("Quantidade de Números Primos no Sorteio")
-    ax.set_ylabel("Número de Sorteios")
-    plt.tight_layout()
-    st.pyplot(fig)
-
-
-def plot_repeated_numbers_distribution_st(df_repeated):
+# Os gráficos ficam no cache compartilhado (por versão dos dados e parâmetros)
+# e são desenhados pelo navegador a partir das especificações Altair.
+def plot_number_frequency_st(number_counts, version, filter_id=()):
+    chart = cached_chart(version, 'frequencia', (filter_id,), lambda: number_bar_chart(
+        number_counts, "Frequência dos Números na Lotofácil", "Frequência"))
+    st.altair_chart(chart, use_container_width=True)
+
+
+def plot_even_odd_distribution_st(df_even_odd, version, filter_id=()):
+    chart = cached_chart(version, 'pares', (filter_id,), lambda: distribution_chart(
+        df_even_odd["Pares"], "Distribuição da Quantidade de Números Pares por Sorteio",
+        "Quantidade de Números Pares no Sorteio"))
+    st.altair_chart(chart, use_container_width=True)
+
+
+def plot_primes_distribution_st(df_primes, version, filter_id=()):
+    chart = cached_chart(version, 'primos', (filter_id,), lambda: distribution_chart(
+        df_primes["Primos"], "Distribuição da Quantidade de Números Primos por Sorteio",
+        "Quantidade de Números Primos no Sorteio"))
+    st.altair_chart(chart, use_container_width=True)
+
+
+def plot_repeated_numbers_distribution_st(df_repeated, version, filter_id=()):
     if df_repeated.empty or "Repetidos" not in df_repeated.columns:
         st.write("Não há dados suficientes para exibir o gráfico de números repetidos.")
         return
-    count_data = df_repeated["Repetidos"].value_counts().sort_index()
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=count_data.index, y=count_data.values, ax=ax, palette="mako")
-    ax.set_title("Distribuição da Quantidade de Números Repetidos do Sorteio Anterior")
-    ax.set_xlabel("Quantidade de Números Repetidos")
-    ax.set_ylabel("Número de Sorteios")
-    plt.tight_layout()
-    st.pyplot(fig)
-
-
-def plot_overdue_numbers_st(overdue_counts):
-    sorted_overdue = sorted(overdue_counts.items(), key=lambda item: item[1], reverse=True)
-    numbers = [item[0] for item in sorted_overdue]
-    cycles = [item[1] for item in sorted_overdue]
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.barplot(x=numbers, y=cycles, ax=ax, palette="rocket")
-    ax.set_title("Números Mais Atrasados (Ciclos)")
-    ax.set_xlabel("Número")
-    ax.set_ylabel("Número de Sorteios Atrasado")
-    ax.tick_params(axis="x", rotation=90)
-    plt.tight_layout()
-    st.pyplot(fig)
+    chart = cached_chart(version, 'repetidos', (filter_id,), lambda: distribution_chart(
+        df_repeated["Repetidos"], "Distribuição da Quantidade de Números Repetidos do Sorteio Anterior",
+        "Quantidade de Números Repetidos"))
+    st.altair_chart(chart, use_container_width=True)
+
+
+def plot_overdue_numbers_st(overdue_counts, version, num_draws, filter_id=()):
+    chart = cached_chart(version, 'atrasados', (num_draws, filter_id), lambda: number_bar_chart(
+        overdue_counts, "Números Mais Atrasados (Ciclos)", "Número de Sorteios Atrasado", sort_by_value=True))
+    st.altair_chart(chart, use_container_width=True)
 
 
 # --- Interface Streamlit ---
@@ -95,7 +65,7 @@ st.title("Análise Estatística e Gerador de Jogos da Lotofácil")
 
 # Carregar dados
 try:
-    df, dezenas_cols = load_data()
+    df, dezenas_cols, data_version = cached_load_data()
     st.success("Dados carregados com sucesso!")
     st.write(f"{len(df)} sorteios carregados após limpeza de dados.")
 except FileNotFoundError:
@@ -105,6 +75,17 @@ except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
     st.stop()
 
+# Pré-calcula em segundo plano as análises mais usadas (uma vez por versão dos dados,
+# compartilhadas entre todas as sessões)
+warm_cache(data_version, df, dezenas_cols, [
+    (analyze_number_frequency, ()),
+    (analyze_even_odd_per_draw, ()),
+    (analyze_primes_per_draw, ()),
+    (analyze_repeated_numbers, ()),
+    (analyze_overdue_numbers, (100,)),
+    (analyze_overdue_numbers, (None,)),
+])
+
 st.sidebar.header("Configurações")
 app_mode = st.sidebar.selectbox(
     "Escolha o modo:",
@@ -125,36 +106,55 @@ if app_mode == "Análise Estatística":
         ]
     )
 
+    # Recorte por intervalo de concursos e repetição (sem copiar o DataFrame)
+    st.sidebar.subheader("Filtros de Concursos")
+    first_concurso, last_concurso = int(df['Concurso'].iloc[0]), int(df['Concurso'].iloc[-1])
+    contest_range = st.sidebar.slider("Intervalo de concursos", first_concurso, last_concurso,
+                                      (first_concurso, last_concurso))
+    min_repeats = st.sidebar.number_input("Mínimo de repetidos do concurso anterior (0 = sem filtro)", 0, 15, 0)
+    filters = {}
+    if contest_range != (first_concurso, last_concurso):
+        filters['concursos'] = contest_range
+    if min_repeats > 0:
+        filters['repeats'] = (int(min_repeats), None)
+    filter_id = filters_key(filters)
+    if filters:
+        selected_rows = cached_rows(data_version, df, dezenas_cols, filters)
+        st.sidebar.write(f"{len(selected_rows)} sorteios selecionados")
+        if len(selected_rows) == 0:
+            st.warning("Nenhum sorteio corresponde aos filtros escolhidos.")
+            st.stop()
+
     if analysis_type == "Frequência dos Números":
         st.header("Frequência dos Números Sorteados")
-        freqs = analyze_number_frequency(df, dezenas_cols)
-        plot_number_frequency_st(freqs)
+        freqs = cached_analysis(data_version, analyze_number_frequency, df, dezenas_cols, filters=filters)
+        plot_number_frequency_st(freqs, data_version, filter_id)
         st.dataframe(pd.DataFrame(sorted(freqs.items()), columns=["Número","Frequência"]))
 
     elif analysis_type == "Distribuição Pares/Ímpares":
         st.header("Distribuição Pares/Ímpares por Sorteio")
-        eo_df = analyze_even_odd_per_draw(df, dezenas_cols)
-        plot_even_odd_distribution_st(eo_df)
+        eo_df = cached_analysis(data_version, analyze_even_odd_per_draw, df, dezenas_cols, filters=filters)
+        plot_even_odd_distribution_st(eo_df, data_version, filter_id)
         st.dataframe(eo_df.head(100))
 
     elif analysis_type == "Distribuição de Primos":
         st.header("Distribuição de Primos por Sorteio")
-        primes_df = analyze_primes_per_draw(df, dezenas_cols)
-        plot_primes_distribution_st(primes_df)
+        primes_df = cached_analysis(data_version, analyze_primes_per_draw, df, dezenas_cols, filters=filters)
+        plot_primes_distribution_st(primes_df, data_version, filter_id)
         st.dataframe(primes_df.head(100))
 
     elif analysis_type == "Números Atrasados":
         st.header("Análise de Números Atrasados")
         draws = st.sidebar.number_input("Considerar quantos concursos? (0 para todos)", min_value=0, value=100, step=10)
         num_draws = None if draws == 0 else draws
-        overdue = analyze_overdue_numbers(df, dezenas_cols, num_draws)
-        plot_overdue_numbers_st(overdue)
+        overdue = cached_analysis(data_version, analyze_overdue_numbers, df, dezenas_cols, num_draws, filters=filters)
+        plot_overdue_numbers_st(overdue, data_version, num_draws, filter_id)
         st.dataframe(pd.DataFrame(sorted(overdue.items(), key=lambda x: x[1], reverse=True), columns=["Número","Atraso"]))
 
     elif analysis_type == "Números Repetidos":
         st.header("Números Repetidos do Sorteio Anterior")
-        rep_df = analyze_repeated_numbers(df, dezenas_cols)
-        plot_repeated_numbers_distribution_st(rep_df)
+        rep_df = cached_analysis(data_version, analyze_repeated_numbers, df, dezenas_cols, filters=filters)
+        plot_repeated_numbers_distribution_st(rep_df, data_version, filter_id)
         st.dataframe(rep_df.head(100))
 
 # --- Gerador de Jogos ---
@@ -167,33 +167,33 @@ elif app_mode == "Gerador de Jogos":
             "Pares/Ímpares",
             "Primos",
             "Atrasados",
-            "Repetidos"
+            "Repetidos",
+            "Filtros Combinados"
         ]
     )
-    num_games = st.sidebar.number_input("Quantos jogos?", min_value=1, max_value=10, value=1)
-    games = []
+    num_games = st.sidebar.number_input("Quantos jogos?", min_value=1, max_value=100_000, value=1)
+    seed_input = st.sidebar.number_input("Semente (0 = aleatória)", min_value=0, value=0, step=1)
+    seed = None if seed_input == 0 else int(seed_input)
+    games = None
 
     if generator_type == "Frequência":
         if st.button("Gerar por Frequência"):
-            freq_counts = analyze_number_frequency(df, dezenas_cols)
-            for _ in range(num_games):
-                games.append(generate_numbers_frequency_based(freq_counts))
+            freq_counts = cached_analysis(data_version, analyze_number_frequency, df, dezenas_cols)
+            games = generate_batch('frequency', num_games, seed, number_counts=freq_counts)
 
     elif generator_type == "Pares/Ímpares":
         evens = st.sidebar.slider("Qtd. de pares", 0, 12, 7)
         odds = 15 - evens
         st.sidebar.write(f"Ímpares: {odds}")
         if st.button("Gerar por Pares/Ímpares"):
-            for _ in range(num_games):
-                games.append(generate_numbers_even_odd_based(evens, odds))
+            games = generate_batch('even_odd', num_games, seed, num_evens=evens, num_odds=odds)
 
     elif generator_type == "Primos":
         max_pr = len(PRIMES_UP_TO_25)
         prions = st.sidebar.slider("Qtd. de primos", 0, max_pr, min(4, max_pr))
         st.sidebar.write(f"Não-primos: {15-prions}")
         if st.button("Gerar por Primos"):
-            for _ in range(num_games):
-                games.append(generate_numbers_prime_based(prions))
+            games = generate_batch('prime', num_games, seed, num_primes_desired=prions)
 
     elif generator_type == "Atrasados":
         draws_ov = st.sidebar.number_input("Concursos para atraso (0=p/ todos)", 0, 1000, 100)
@@ -201,9 +201,8 @@ elif app_mode == "Gerador de Jogos":
         num_draws_ov = None if draws_ov == 0 else draws_ov
         top_val = None if topn == 0 else topn
         if st.button("Gerar por Atraso"):
-            od = analyze_overdue_numbers(df, dezenas_cols, num_draws_ov)
-            for _ in range(num_games):
-                games.append(generate_numbers_overdue_based(od, top_n_overdue=top_val))
+            od = cached_analysis(data_version, analyze_overdue_numbers, df, dezenas_cols, num_draws_ov)
+            games = generate_batch('overdue', num_games, seed, overdue_counts=od, top_n_overdue=top_val)
 
     elif generator_type == "Repetidos":
         st.sidebar.markdown("**Repetição Padrão**: geralmente 10 ou 11 números do último sorteio")
@@ -216,15 +215,42 @@ elif app_mode == "Gerador de Jogos":
         else:
             rep = st.sidebar.slider("Qtd. a repetir", 0, max_rep, min(8, max_rep))
         if st.button("Gerar por Repetidos"):
-            for _ in range(num_games):
-                games.append(generate_numbers_repeated_based(df, dezenas_cols, rep))
+            games = generate_batch('repeated', num_games, seed, last_draw_numbers=last_nums, num_to_repeat=rep)
+
+    elif generator_type == "Filtros Combinados":
+        last_nums = [int(n) for n in df.iloc[-1][dezenas_cols].values]
+        evens_range = st.sidebar.slider("Pares", 0, 12, (6, 8))
+        primes_range = st.sidebar.slider("Primos", 0, len(PRIMES_UP_TO_25), (4, 6))
+        repeats_range = st.sidebar.slider("Repetidos do último sorteio", 0, 15, (8, 10))
+        sum_range = st.sidebar.slider("Soma das dezenas", 120, 270, (180, 210))
+        weighting = st.sidebar.radio("Ponderação", ["Uniforme", "Frequência", "Atraso"])
+        constraints = {'evens': evens_range, 'primes': primes_range, 'repeats': repeats_range,
+                       'last_draw': last_nums, 'sum_range': sum_range}
+        st.write(f"Jogos que satisfazem os filtros: {count_tickets(**constraints)}")
+        if st.button("Gerar com Filtros"):
+            weights = None
+            if weighting == "Frequência":
+                weights = cached_analysis(data_version, analyze_number_frequency, df, dezenas_cols)
+            elif weighting == "Atraso":
+                od = cached_analysis(data_version, analyze_overdue_numbers, df, dezenas_cols, None)
+                weights = {n: d - min(od.values()) + 1 for n, d in od.items()}
+            try:
+                games = sample_tickets(num_games, seed, weights=weights, **constraints)
+            except ValueError as e:
+                st.error(str(e))
 
-    if games:
+    if games is not None:
         st.header("Jogos Gerados")
-        for idx, g in enumerate(games, start=1):
-            # converter numpy types para int puro
-            numbers = sorted(int(x) for x in g)
-            st.markdown(f"**Jogo {idx}:** {numbers}")
+        if len(games) <= 10:
+            for idx, g in enumerate(games, start=1):
+                st.markdown(f"**Jogo {idx}:** {g.tolist()}")
+        else:
+            games_df = pd.DataFrame(games, columns=[f"D{i}" for i in range(1, games.shape[1] + 1)])
+            games_df.index = games_df.index + 1
+            st.write(f"{len(games_df)} jogos gerados.")
+            st.dataframe(games_df.head(1000))
+            st.download_button("Baixar todos os jogos (CSV)", games_df.to_csv(index_label="Jogo"),
+                               file_name="jogos_lotofacil.csv", mime="text/csv")
 
 st.sidebar.info(
     "Esta aplicação analisa dados históricos e gera sugestões. "
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from lotofacil_data import load_store
+from lotofacil_model import DEFAULT_LAGS, DEFAULT_WINDOWS, build_features
+from lotofacil_store import NUM_DEZENAS
+
+MODELS = ('sgd', 'forest')
+_EPS = 1e-12
+
+
+# --- Splits ---
+
+def walk_forward_splits(n_rows, initial=500, step=50, window=None):
+    """Returns the (train, test) slices of a walk-forward over rows in contest order.
+
+    Each fold tests the ``step`` rows that follow its training rows: all
+    earlier rows (expanding window) or only the last ``window`` rows
+    (sliding window). Slices keep every fold's arrays as views.
+    """
+    if initial < 1 or step < 1:
+        raise ValueError("O treino inicial e o passo devem ser positivos.")
+    if initial >= n_rows:
+        raise ValueError(f"Treino inicial ({initial}) deve ser menor que o número de concursos ({n_rows}).")
+    return [(slice(0 if window is None else max(0, start - window), start), slice(start, min(start + step, n_rows)))
+            for start in range(initial, n_rows, step)]
+
+
+# --- Models ---
+
+def _sgd_chain(X, y, splits, seed, alpha, eta0):
+    """Walks the folds for one number, updating a logistic SGD model with only the new rows."""
+    scaler = StandardScaler()
+    # Passo constante e pequeno: o passo 'optimal' satura as probabilidades em 0/1 com uma passada só
+    model = SGDClassifier(loss='log_loss', alpha=alpha, learning_rate='constant', eta0=eta0, random_state=seed)
+    fitted_until = 0
+    probabilities = []
+    for train, test in splits:
+        new_rows = slice(fitted_until, train.stop)
+        scaler.partial_fit(X[new_rows])
+        model.partial_fit(scaler.transform(X[new_rows]), y[new_rows], classes=[0, 1])
+        fitted_until = train.stop
+        probabilities.append(model.predict_proba(scaler.transform(X[test]))[:, 1])
+    return np.concatenate(probabilities)
+
+
+def _forest_fold(X, y, train, test, n_estimators, seed, max_depth):
+    """Fits one multi-output forest on a fold and returns the (test rows, numbers) probabilities."""
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed, max_depth=max_depth, n_jobs=1)
+    single = y.shape[1] == 1
+    model.fit(X[train], y[train, 0] if single else y[train])
+    outputs = model.predict_proba(X[test])
+    classes_per_output = [model.classes_] if single else model.classes_
+    probabilities = np.zeros((test.stop - test.start, y.shape[1]))
+    for j, (proba, classes) in enumerate(zip([outputs] if single else outputs, classes_per_output)):
+        if 1 in classes:
+            probabilities[:, j] = proba[:, list(classes).index(1)]
+    return probabilities
+
+
+# --- Evaluation ---
+
+def fold_metrics(probabilities, y, splits, concursos, dezenas):
+    """Returns accuracy, log loss and Brier score per fold and number."""
+    records = []
+    offset = 0
+    for fold, (train, test) in enumerate(splits):
+        rows = test.stop - test.start
+        p = probabilities[offset:offset + rows]
+        target = y[test].astype(np.float64)
+        offset += rows
+        accuracy = ((p >= 0.5) == (target == 1)).mean(axis=0)
+        log_loss = -(target * np.log(np.clip(p, _EPS, 1)) + (1 - target) * np.log(np.clip(1 - p, _EPS, 1))).mean(axis=0)
+        brier = ((p - target) ** 2).mean(axis=0)
+        for j, dezena in enumerate(dezenas):
+            records.append([fold, int(concursos[test.start]), int(concursos[test.stop - 1]),
+                            train.stop - train.start, rows, dezena, accuracy[j], log_loss[j], brier[j]])
+    return pd.DataFrame(records, columns=['Fold', 'ConcursoInicial', 'ConcursoFinal', 'Treino', 'Teste',
+                                          'Dezena', 'Acuracia', 'LogLoss', 'Brier'])
+
+
+def walk_forward(store, dezenas=None, initial=500, step=50, window=None, model='sgd', n_jobs=-1, seed=42,
+                 lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, alpha=1e-4, eta0=1e-3, n_estimators=100, max_depth=8):
+    """Evaluates per-number models over contest order without looking at future draws.
+
+    ``model='sgd'`` keeps one logistic SGD model per number and updates
+    it with ``partial_fit`` on the rows added since the previous fold, so
+    the walk costs one pass over the history (expanding window only);
+    numbers run in parallel. ``model='forest'`` fits one multi-output
+    forest per fold (expanding or sliding window), folds in parallel.
+    Returns ``(probabilities, metrics)``: the (test rows, numbers)
+    out-of-sample probabilities and the per-fold metrics table.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modelo desconhecido: {model}. Opções: {list(MODELS)}")
+    if model == 'sgd' and window is not None:
+        raise ValueError("O modelo incremental (sgd) só aceita janela expansiva.")
+    dezenas = list(range(1, NUM_DEZENAS + 1)) if dezenas is None else list(dezenas)
+    features = build_features(store, lags, windows)
+    X = features['X']
+    y = features['y'][:, [d - 1 for d in dezenas]]
+    splits = walk_forward_splits(len(X), initial, step, window)
+
+    if model == 'sgd':
+        columns = Parallel(n_jobs=n_jobs)(
+            delayed(_sgd_chain)(X, y[:, j], splits, seed, alpha, eta0) for j in range(len(dezenas)))
+        probabilities = np.column_stack(columns)
+    else:
+        folds = Parallel(n_jobs=n_jobs)(
+            delayed(_forest_fold)(X, y, train, test, n_estimators, seed, max_depth) for train, test in splits)
+        probabilities = np.vstack(folds)
+    return probabilities, fold_metrics(probabilities, y, splits, features['concursos'], dezenas)
+
+
+def summarize(metrics):
+    """Averages the fold metrics per number, weighting each fold by its test rows."""
+    weighted = metrics[['Acuracia', 'LogLoss', 'Brier']].mul(metrics['Teste'], axis=0)
+    totals = weighted.groupby(metrics['Dezena']).sum().div(metrics.groupby('Dezena')['Teste'].sum(), axis=0)
+    totals['Folds'] = metrics.groupby('Dezena')['Fold'].count()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação walk-forward dos modelos por dezena.")
+    parser.add_argument('--csv', default='lotofacil.csv')
+    parser.add_argument('--model', choices=MODELS, default='sgd')
+    parser.add_argument('--dezenas', type=int, nargs='+', default=None)
+    parser.add_argument('--initial', type=int, default=500, help="Concursos no primeiro treino")
+    parser.add_argument('--step', type=int, default=50, help="Concursos testados por fold")
+    parser.add_argument('--window', type=int, default=None, help="Janela deslizante de treino (padrão: expansiva)")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--output', default=None, help="CSV com as métricas por fold")
+    args = parser.parse_args()
+
+    store = load_store(args.csv)
+    start = time.perf_counter()
+    _, metrics = walk_forward(store, args.dezenas, args.initial, args.step, args.window, args.model, args.n_jobs)
+    print(f"{metrics['Fold'].nunique()} folds avaliados em {time.perf_counter() - start:.1f} s")
+    print(summarize(metrics).to_string(float_format='{:.4f}'.format))
+    if args.output:
+        metrics.to_csv(args.output, index=False)
+        print(f"Métricas salvas em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from lotofacil_store import EVEN_MASK, popcount
+
+DEFAULT_WINDOWS = (50,)
+_CACHE_SIZE = 8
+# Cada janela de 1M de concursos ocupa ~400 MB; acima deste total o cache descarta
+_CACHE_MAX_BYTES = 256 * 2 ** 20
+
+_window_cache = OrderedDict()
+
+
+def delay_as_of(incidence):
+    """Returns the (N, 25) delay of each number as of each row (0 when drawn in that row).
+
+    Numbers not yet drawn count the rows since the start of the history
+    (row i gives i + 1).
+    """
+    rows = np.arange(len(incidence))[:, None]
+    last_seen = np.where(incidence.astype(bool), rows, -1)
+    np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+    return np.subtract(rows, last_seen, out=last_seen)
+
+
+def rolling_means(values, window):
+    """Trailing means over ``window`` rows from one cumulative sum (NaN until the window fills)."""
+    cumulative = np.zeros((len(values) + 1,) + values.shape[1:], dtype=np.float64)
+    np.cumsum(values, axis=0, dtype=np.float64, out=cumulative[1:])
+    means = np.full(values.shape, np.nan)
+    if window <= len(values):
+        filled = means[window - 1:]
+        np.subtract(cumulative[window:], cumulative[:-window], out=filled)
+        filled /= window
+    return means
+
+
+class WindowStats(Mapping):
+    """Read-only ``{window: stats}`` mapping that computes each window on first access."""
+
+    def __init__(self, store, windows):
+        self.store = store
+        self.windows = windows
+
+    def __getitem__(self, window):
+        if window not in self.windows:
+            raise KeyError(window)
+        return _window_stats(self.store, window)
+
+    def __contains__(self, window):
+        return window in self.windows
+
+    def __iter__(self):
+        return iter(self.windows)
+
+    def __len__(self):
+        return len(self.windows)
+
+
+def _window_stats(store, window):
+    key = (store.fingerprint(), window)
+    if key in _window_cache:
+        _window_cache.move_to_end(key)
+        return _window_cache[key][1]
+
+    incidence = store.incidence
+    # Um bloco por vez, sem a matriz (N, 52) completa
+    frequencia = rolling_means(incidence, window)
+    atraso = rolling_means(delay_as_of(incidence), window)
+    pares = rolling_means(popcount(store.masks & np.uint32(EVEN_MASK)), window)
+    soma = rolling_means(incidence @ np.arange(1, 26, dtype=np.int64), window)
+    index = pd.Index(store.concursos, name='Concurso')
+    numbers = pd.Index(range(1, 26), name='Número')
+    result = {
+        'frequencia': pd.DataFrame(frequencia, index=index, columns=numbers, copy=False),
+        'atraso': pd.DataFrame(atraso, index=index, columns=numbers, copy=False),
+        'pares': pd.Series(pares, index=index, name='Pares', copy=False),
+        'soma': pd.Series(soma, index=index, name='Soma', copy=False),
+    }
+
+    size = frequencia.nbytes + atraso.nbytes + pares.nbytes + soma.nbytes
+    if size <= _CACHE_MAX_BYTES:
+        _window_cache[key] = (size, result)
+        while (len(_window_cache) > _CACHE_SIZE
+               or sum(cached for cached, _ in _window_cache.values()) > _CACHE_MAX_BYTES):
+            _window_cache.popitem(last=False)
+    return result
+
+
+def rolling_window_stats(store, windows=DEFAULT_WINDOWS):
+    """Rolling frequency, delay, evens and sum for all 25 numbers and several windows.
+
+    Returns a ``{window: {'frequencia': DataFrame, 'atraso': DataFrame,
+    'pares': Series, 'soma': Series}}`` mapping indexed by Concurso. The
+    per-number frames have one column per number (1-25). Each window is
+    computed on first access and cached per store fingerprint while the
+    cached results fit in ``_CACHE_MAX_BYTES``, so long histories only
+    hold the windows actually read.
+    """
+    return WindowStats(store, tuple(sorted(set(int(w) for w in windows))))
+
+
+def clear_cache():
+    """Drops the cached window statistics."""
+    _window_cache.clear()
@@ -3,35 +3,67 @@
 
 """
 Requisitos:
-    pip install opencv-python tensorflow pytesseract numpy
+    pip install opencv-python tensorflow pytesseract numpy cachetools
 Certifique-se de ter o Tesseract OCR instalado no seu sistema.
 No Windows, configure pytesseract.pytesseract.tesseract_cmd se necessário.
+
+Uso:
+    python slot_analysis.py video.mp4 modelo.h5 --classes cereja limao sete bar
+    python slot_analysis.py gravacoes/ modelo.h5 --classes cereja limao sete bar --saida slots.parquet
 """
 
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import cv2
 import numpy as np
+import pandas as pd
+from cachetools import LRUCache
 from tensorflow.keras.models import load_model
 import pytesseract
-import csv
 
 # Ajuste este caminho se necessário:
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# Defina as ROIs: (x, y, w, h)
+ROLO_ROIS = [
+    (100, 200, 64, 64), (100, 270, 64, 64), (100, 340, 64, 64),
+    (200, 200, 64, 64), (200, 270, 64, 64), (200, 340, 64, 64),
+    (300, 200, 64, 64), (300, 270, 64, 64), (300, 340, 64, 64),
+]
+CREDITO_ROI = (400, 50, 150, 50)
+TARGET_SIZE = (64, 64)
+FRAMES_POR_LOTE = 32
+# Lotes prontos aguardando a inferência (limita a memória se o modelo for mais lento que a leitura)
+FILA_MAXIMA = 4
+# Detecção de mudanças: hash de 16x16 bits por ROI; até LIMIAR_HASH bits de diferença contam como parado
+HASH_LADO = 16
+LIMIAR_HASH = 10
+# Um dígito do crédito muda poucos bits do hash, então o crédito usa um limiar mais estreito
+LIMIAR_CREDITO = 2
+QUADROS_ESTAVEIS = 2
+TAMANHO_CACHE = 4096
+# Modo diretório: vídeos longos são divididos em segmentos deste tamanho
+SEGUNDOS_POR_SEGMENTO = 600
+EXTENSOES_VIDEO = ('.avi', '.mkv', '.mov', '.mp4')
+_FIM = object()
+
+
 def carregar_modelo(path_modelo):
     model = load_model(path_modelo)
     return model
 
-def preprocess_roi(roi, target_size=(64, 64)):
-    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-    resized = cv2.resize(gray, target_size)
-    norm = resized.astype('float32') / 255.0
-    return np.expand_dims(norm, axis=(0, -1))
-
-def classificar_simbolo(roi, model, classes):
-    x = preprocess_roi(roi)
-    preds = model.predict(x)
-    idx = np.argmax(preds, axis=1)[0]
-    return classes[idx]
+def classificar_lote(x, model, classes):
+    """Classifies a (n, 64, 64, 1) batch of ROIs with a single model call."""
+    preds = np.asarray(model.predict_on_batch(x))
+    return [classes[i] for i in np.argmax(preds, axis=1)]
 
 def ocr_texto(roi):
     gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
@@ -40,25 +72,394 @@ def ocr_texto(roi):
     text = pytesseract.image_to_string(thresh, config=config)
     return text.strip()
 
-def processar_video(path_video, model_path, classes, output_csv='resultado_slots.csv'):
-    model = carregar_modelo(model_path)
+def recortar(frame, roi):
+    x, y, w, h = roi
+    return frame[y:y + h, x:x + w]
+
+
+# --- Detecção de mudanças ---
+
+def dhash(gray, lado=HASH_LADO):
+    """Difference hash of a grayscale ROI as a ``lado * lado``-bit int (sign of horizontal gradients)."""
+    small = cv2.resize(gray, (lado + 1, lado), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+
+
+def distancia(a, b):
+    """Hamming distance between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class DetectorRoi:
+    """Tracks one ROI's hash across frames to tell still content from motion.
+
+    The ROI is stable after ``quadros_estaveis`` consecutive frames within
+    ``limiar`` bits of the previous one; while it moves (reel spinning,
+    credit counting up) ``atualizar`` returns ``None``. A stable ROI keeps
+    the key of its current still segment, so it is only reported as new
+    when it settles on different content.
+    """
+
+    def __init__(self, limiar=LIMIAR_HASH, quadros_estaveis=QUADROS_ESTAVEIS):
+        self.limiar = limiar
+        self.quadros_estaveis = quadros_estaveis
+        self.anterior = None
+        self.parado = 0
+        self.chave = None
+
+    def atualizar(self, h):
+        """Returns ``(chave, novo)`` for the frame's hash; ``chave`` is None while the ROI moves."""
+        if self.anterior is not None and distancia(h, self.anterior) <= self.limiar:
+            self.parado += 1
+        else:
+            self.parado = 0
+        self.anterior = h
+        if self.parado < self.quadros_estaveis:
+            return None, False
+        if self.chave is not None and distancia(h, self.chave) <= self.limiar:
+            return self.chave, False
+        self.chave = h
+        return h, True
+
+
+# --- Pipeline: leitura -> inferência em lote -> escrita ---
+
+def _decodificar(path_video, fila, frames_por_lote, parar, detectar_mudancas, inicio=0, fim=None):
+    """Decoder thread: hashes every ROI and queues only the crops of newly settled ones.
+
+    Each queued batch carries, per frame, the segment key of the nine reels
+    and the credit (None while moving) and the crops that need a result.
+    Only frames in ``[inicio, fim)`` are queued; the few frames before
+    ``inicio`` are still decoded so the detectors start already settled.
+    """
+    try:
+        cap = cv2.VideoCapture(path_video)
+        if not cap.isOpened():
+            raise OSError(f"Não foi possível abrir o vídeo {path_video}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        rois = ROLO_ROIS + [CREDITO_ROI]
+        detectores = [DetectorRoi() for _ in ROLO_ROIS] + [DetectorRoi(limiar=LIMIAR_CREDITO)]
+        frame_idx = inicio - (min(inicio, QUADROS_ESTAVEIS) if detectar_mudancas else 0)
+        if frame_idx:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        while not parar.is_set():
+            indices, chaves, novos = [], [], []
+            while len(indices) < frames_por_lote and (fim is None or frame_idx < fim):
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                linha = []
+                for r, roi in enumerate(rois):
+                    recorte = recortar(frame, roi)
+                    gray = cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY)
+                    h = dhash(gray)
+                    chave, novo = detectores[r].atualizar(h) if detectar_mudancas else (h, True)
+                    linha.append(chave)
+                    if novo:
+                        # Rolos seguem em tons de cinza 64x64; o crédito vai em BGR para o OCR
+                        novos.append((r, chave, recorte.copy() if r == len(ROLO_ROIS) else cv2.resize(gray, TARGET_SIZE)))
+                if frame_idx >= inicio:
+                    chaves.append(linha)
+                    indices.append(frame_idx)
+                frame_idx += 1
+            if not indices:
+                break
+            fila.put((indices, fps, chaves, novos))
+        cap.release()
+    except Exception as e:
+        fila.put(e)
+        return
+    fila.put(_FIM)
+
+
+def _escrever(output_csv, fila, erros, checkpoint=None, anexar=False):
+    """Writer thread: streams result rows to the CSV as batches finish, then checkpoints the last frame.
+
+    A failure (e.g. disk full) is appended to ``erros`` for the caller to re-raise.
+    """
+    try:
+        with open(output_csv, 'a' if anexar else 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if not anexar:
+                writer.writerow(['frame', 'tempo_s'] + [f'simbolo_{i}' for i in range(1, len(ROLO_ROIS) + 1)]
+                                + ['credito'])
+            while True:
+                linhas = fila.get()
+                if linhas is _FIM:
+                    break
+                writer.writerows(linhas)
+                f.flush()
+                if checkpoint is not None:
+                    _salvar_checkpoint(checkpoint, linhas[-1][0], False)
+    except Exception as e:
+        erros.append(e)
+
+
+def _entregar(fila, item, escritor, erros):
+    """Puts on the writer queue, raising the writer's error instead of blocking if it died."""
+    while True:
+        try:
+            fila.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if not escritor.is_alive():
+                raise erros[0] if erros else RuntimeError("A thread de escrita terminou inesperadamente.")
 
-    # Defina as ROIs: (x, y, w, h)
-    rolo_rois = [
-        (100, 200, 64, 64), (100, 270, 64, 64), (100, 340, 64, 64),
-        (200, 200, 64, 64), (200, 270, 64, 64), (200, 340, 64, 64),
-        (300, 200, 64, 64), (300, 270, 64, 64), (300, 340, 64, 64),
-    ]
-    credito_roi = (400, 50, 150, 50)
 
+# --- Checkpoints ---
+
+def _salvar_checkpoint(checkpoint, frame, concluido):
+    temporario = checkpoint + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'frame': frame, 'concluido': concluido}, f)
+    os.replace(temporario, checkpoint)
+
+
+def _retomar(output_csv, checkpoint):
+    """Loads a checkpoint and trims the CSV to its last checkpointed frame.
+
+    Returns None when there is nothing to resume (no checkpoint or no CSV).
+    Rows written after the last checkpoint (interrupted between the flush
+    and the checkpoint) are dropped so they are not duplicated.
+    """
+    if not (os.path.exists(checkpoint) and os.path.exists(output_csv)):
+        return None
+    with open(checkpoint, encoding='utf-8') as f:
+        estado = json.load(f)
+    if not estado['concluido']:
+        with open(output_csv, encoding='utf-8', newline='') as f:
+            linhas = list(csv.reader(f))
+        with open(output_csv, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(linhas[:1] + [l for l in linhas[1:] if l and int(l[0]) <= estado['frame']])
+    return estado
+
+
+def processar_video(path_video, model_path, classes, output_csv='resultado_slots.csv',
+                    frames_por_lote=FRAMES_POR_LOTE, model=None, detectar_mudancas=True,
+                    inicio=0, fim=None, checkpoint=None):
+    """Classifies the nine reel symbols and reads the credit of every frame into ``output_csv``.
+
+    A decoder thread hashes each ROI (dHash) and only forwards the crops of
+    ROIs that settled on new content; the calling thread runs at most one
+    ``predict_on_batch`` per batch of ``frames_por_lote`` frames plus the
+    credit OCR, reusing results from LRU caches keyed by hash, and a writer
+    thread streams the rows. ROIs in motion are written as empty strings.
+    ``detectar_mudancas=False`` treats every frame as new (results are still
+    cached by hash). ``inicio``/``fim`` restrict the run to a frame range;
+    with a ``checkpoint`` path the last written frame is saved after every
+    batch and an interrupted run resumes from it (a finished one is
+    skipped). Returns the number of frames processed.
+    """
+    anexar = False
+    ultimo = inicio - 1
+    if checkpoint is not None:
+        estado = _retomar(output_csv, checkpoint)
+        if estado is not None:
+            if estado['concluido']:
+                print(f"{output_csv} já concluído, ignorando.")
+                return 0
+            ultimo = max(ultimo, estado['frame'])
+            inicio, anexar = ultimo + 1, True
+    if model is None:
+        model = carregar_modelo(model_path)
+    simbolos = LRUCache(maxsize=TAMANHO_CACHE)
+    creditos = LRUCache(maxsize=TAMANHO_CACHE)
+    n_rolos = len(ROLO_ROIS)
+    # Último segmento parado de cada ROI: (chave, resultado), independente de despejos do LRU
+    vigentes = [(None, '')] * (n_rolos + 1)
+    lotes = queue.Queue(maxsize=FILA_MAXIMA)
+    resultados = queue.Queue(maxsize=FILA_MAXIMA)
+    parar = threading.Event()
+    erros_escrita = []
+    leitor = threading.Thread(target=_decodificar,
+                              args=(path_video, lotes, frames_por_lote, parar, detectar_mudancas, inicio, fim),
+                              daemon=True)
+    escritor = threading.Thread(target=_escrever, args=(output_csv, resultados, erros_escrita, checkpoint, anexar),
+                                daemon=True)
+    leitor.start()
+    escritor.start()
+
+    total = inferencias = ocrs = 0
+    comeco = time.perf_counter()
+    try:
+        while True:
+            lote = lotes.get()
+            if lote is _FIM:
+                break
+            if isinstance(lote, Exception):
+                raise lote
+            indices, fps, chaves, novos = lote
+            pendentes = {}
+            for r, chave, imagem in novos:
+                if r == n_rolos:
+                    if chave not in creditos:
+                        creditos[chave] = ocr_texto(imagem)
+                        ocrs += 1
+                elif chave not in simbolos:
+                    pendentes[chave] = imagem
+            if pendentes:
+                x = np.stack(list(pendentes.values()))[..., None].astype('float32') / 255.0
+                for chave, simbolo in zip(pendentes, classificar_lote(x, model, classes)):
+                    simbolos[chave] = simbolo
+                inferencias += len(pendentes)
+
+            linhas = []
+            for frame_idx, linha in zip(indices, chaves):
+                valores = []
+                for r, chave in enumerate(linha):
+                    if chave is None:
+                        valores.append('')
+                        continue
+                    if vigentes[r][0] != chave:
+                        vigentes[r] = (chave, (creditos if r == n_rolos else simbolos)[chave])
+                    valores.append(vigentes[r][1])
+                tempo = round(frame_idx / fps, 3) if fps else ''
+                linhas.append([frame_idx, tempo] + valores)
+            _entregar(resultados, linhas, escritor, erros_escrita)
+            total += len(indices)
+            ultimo = indices[-1]
+    finally:
+        parar.set()
+        # Esvazia a fila para o leitor não ficar bloqueado em put() ao encerrar
+        while leitor.is_alive():
+            try:
+                lotes.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        # Mesmo cuidado com o escritor: se ele morreu, a fila pode estar cheia para sempre
+        while escritor.is_alive():
+            try:
+                resultados.put(_FIM, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        escritor.join()
+    if erros_escrita:
+        raise erros_escrita[0]
+    if checkpoint is not None:
+        _salvar_checkpoint(checkpoint, ultimo, True)
+
+    elapsed = time.perf_counter() - comeco
+    print(f"{total} frames processados em {elapsed:.1f} s ({total / max(elapsed, 1e-9):.1f} fps). "
+          f"Resultados em {output_csv}")
+    print(f"{inferencias} classificações e {ocrs} OCRs para {total * n_rolos} rolos e {total} créditos")
+    return total
+
+
+# --- Modo diretório: vários vídeos em processos ---
+
+_modelo_worker = None
+
+
+def _iniciar_worker(model_path):
+    """Pool initializer: loads the Keras model once per worker process."""
+    global _modelo_worker
+    _modelo_worker = carregar_modelo(model_path)
+
+
+def _processar_segmento(tarefa):
+    path_video, classes, inicio, fim, output_csv, frames_por_lote, detectar_mudancas = tarefa
+    return processar_video(path_video, None, classes, output_csv, frames_por_lote, _modelo_worker,
+                           detectar_mudancas, inicio, fim, checkpoint=output_csv + '.checkpoint.json')
+
+
+def segmentar_video(path_video, segundos_por_segmento=SEGUNDOS_POR_SEGMENTO):
+    """Splits a video into ``(inicio, fim)`` frame ranges of about ``segundos_por_segmento``.
+
+    The last range is open (``fim=None``) since container frame counts can
+    be inexact.
+    """
     cap = cv2.VideoCapture(path_video)
-    frame_idx = 0
+    if not cap.isOpened():
+        raise OSError(f"Não foi possível abrir o vídeo {path_video}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    tamanho = max(1, int(round(fps * segundos_por_segmento)))
+    inicios = list(range(0, max(n_frames, 1), tamanho))
+    return [(a, b) for a, b in zip(inicios, inicios[1:] + [None])]
+
+
+def _juntar_partes(partes, saida):
+    """Concatenates the segment CSVs in order into one CSV or Parquet file, one part at a time."""
+    colunas_texto = {f'simbolo_{i}': str for i in range(1, len(ROLO_ROIS) + 1)} | {'credito': str}
+    parquet = saida.endswith('.parquet')
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    escritor_parquet = None
+    try:
+        for i, (video, parte) in enumerate(partes):
+            df = pd.read_csv(parte, dtype=colunas_texto, keep_default_na=False, na_values={'tempo_s': ['']})
+            df.insert(0, 'video', video)
+            if parquet:
+                tabela = pa.Table.from_pandas(df, preserve_index=False)
+                if escritor_parquet is None:
+                    escritor_parquet = pq.ParquetWriter(saida, tabela.schema)
+                escritor_parquet.write_table(tabela.cast(escritor_parquet.schema))
+            else:
+                df.to_csv(saida, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    finally:
+        if escritor_parquet is not None:
+            escritor_parquet.close()
+
+
+def processar_diretorio(diretorio, model_path, classes, saida='resultado_slots.csv', workers=None,
+                        segundos_por_segmento=SEGUNDOS_POR_SEGMENTO, frames_por_lote=FRAMES_POR_LOTE,
+                        detectar_mudancas=True, pasta_trabalho=None):
+    """Processes every video in ``diretorio`` in a process pool and merges the results into ``saida``.
+
+    Videos are split into time segments; each segment runs
+    ``processar_video`` in a worker that loaded the model once, writing a
+    part CSV with a frame checkpoint under ``pasta_trabalho`` (default
+    ``<saida>.partes``), so rerunning after an interruption only redoes
+    unfinished segments. Parts are merged in video and frame order into a
+    CSV, or Parquet when ``saida`` ends with ``.parquet``, with a ``video``
+    column. Returns the number of frames processed in this run.
+    """
+    videos = sorted(nome for nome in os.listdir(diretorio) if nome.lower().endswith(EXTENSOES_VIDEO))
+    if not videos:
+        raise ValueError(f"Nenhum vídeo ({', '.join(EXTENSOES_VIDEO)}) encontrado em {diretorio}")
+    pasta_trabalho = pasta_trabalho or saida + '.partes'
+    os.makedirs(pasta_trabalho, exist_ok=True)
+
+    tarefas, partes = [], []
+    for nome in videos:
+        path_video = os.path.join(diretorio, nome)
+        for n, (inicio, fim) in enumerate(segmentar_video(path_video, segundos_por_segmento)):
+            parte = os.path.join(pasta_trabalho, f"{nome}.{n:04d}.csv")
+            tarefas.append((path_video, classes, inicio, fim, parte, frames_por_lote, detectar_mudancas))
+            partes.append((nome, parte))
+
+    total = 0
+    comeco = time.perf_counter()
+    # spawn: o TensorFlow não é seguro após fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_iniciar_worker, initargs=(model_path,)) as executor:
+        futuros = {executor.submit(_processar_segmento, tarefa): tarefa for tarefa in tarefas}
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            total += futuro.result()
+            print(f"[{concluidos}/{len(tarefas)}] {os.path.basename(futuros[futuro][4])}")
+    _juntar_partes(partes, saida)
+    print(f"{len(videos)} vídeos, {len(tarefas)} segmentos, {total} frames em "
+          f"{time.perf_counter() - comeco:.1f} s. Resultados em {saida}")
+    return total
 
-    with open('/mnt/data/slot_analysis.py', 'w', encoding='utf-8') as f:
-        f.write(script_content)
 
-    print("Arquivo criado em /mnt/data/slot_analysis.py")
-    print("
---- Conteúdo do script ---
-")
-    print(script_content)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extrai símbolos dos rolos e crédito de vídeos de slot.")
+    parser.add_argument('video', help="Vídeo ou diretório de vídeos")
+    parser.add_argument('modelo', help="Modelo Keras de classificação de símbolos")
+    parser.add_argument('--classes', nargs='+', required=True, help="Nomes das classes na ordem do modelo")
+    parser.add_argument('--saida', default='resultado_slots.csv', help="CSV, ou Parquet no modo diretório")
+    parser.add_argument('--lote', type=int, default=FRAMES_POR_LOTE, help="Frames por chamada do modelo")
+    parser.add_argument('--todos-frames', action='store_true', help="Classifica todos os frames, sem detecção de mudanças")
+    parser.add_argument('--workers', type=int, default=None, help="Processos no modo diretório")
+    parser.add_argument('--segmento', type=int, default=SEGUNDOS_POR_SEGMENTO, help="Segundos por segmento de vídeo")
+    args = parser.parse_args()
+    if os.path.isdir(args.video):
+        processar_diretorio(args.video, args.modelo, args.classes, args.saida, args.workers, args.segmento,
+                            args.lote, not args.todos_frames)
+    else:
+        processar_video(args.video, args.modelo, args.classes, args.saida, args.lote,
+                        detectar_mudancas=not args.todos_frames)
@@ -0,0 +1,27 @@
+"""Weighted sampling of lotofacil_constraints."""
+
+import numpy as np
+import pytest
+
+from lotofacil_constraints import sample_tickets
+
+
+def test_zero_weight_numbers_are_never_sampled():
+    weights = {n: float(n) for n in range(2, 26)}
+    tickets = sample_tickets(500, seed=0, weights=weights, evens=7)
+    assert not (tickets == 1).any()
+    assert ((tickets % 2 == 0).sum(axis=1) == 7).all()
+
+
+def test_required_number_without_weight_is_rejected():
+    weights = {n: 1.0 for n in range(1, 26)}
+    weights[1] = 0
+    with pytest.raises(ValueError, match=r'\[1\]'):
+        sample_tickets(3, seed=0, weights=weights, include=[1])
+
+
+@pytest.mark.parametrize('weights', [{n: 1 for n in range(1, 15)}, {n: np.nan for n in range(1, 26)},
+                                     {n: -1 for n in range(1, 26)}])
+def test_unusable_weights_raise_value_error(weights):
+    with pytest.raises(ValueError):
+        sample_tickets(3, seed=0, weights=weights)
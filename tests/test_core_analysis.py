@@ -0,0 +1,196 @@
+"""Pins the vectorized analyzers to the original row-by-row implementations.
+
+The ``_original_*`` functions are the implementations of
+lotofacil_core_analysis and lotofacil_analysis_manus before the DrawStore
+rewrite, kept verbatim (minus printing) as the reference outputs.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import lotofacil_analysis_manus as manus
+import lotofacil_core_analysis as core
+from lotofacil_data import load_data
+
+
+# --- Original Implementations ---
+
+def _original_even_odd_per_draw(df, dezenas_cols):
+    results = []
+    for index, row in df.iterrows():
+        evens = 0
+        odds = 0
+        for col in dezenas_cols:
+            if row[col] % 2 == 0:
+                evens += 1
+            else:
+                odds += 1
+        results.append({'Concurso': row['Concurso'], 'Pares': evens, 'Ímpares': odds})
+    return pd.DataFrame(results)
+
+
+def _original_primes_per_draw(df, dezenas_cols):
+    results = []
+    for index, row in df.iterrows():
+        primes_count = 0
+        for col in dezenas_cols:
+            if core.is_prime(row[col]):
+                primes_count += 1
+        results.append({'Concurso': row['Concurso'], 'Primos': primes_count})
+    return pd.DataFrame(results)
+
+
+def _original_number_frequency(df, dezenas_cols):
+    all_numbers = []
+    for col in dezenas_cols:
+        all_numbers.extend(df[col].tolist())
+    return Counter(all_numbers)
+
+
+def _original_overdue_numbers(df, dezenas_cols, num_draws_to_consider=None):
+    if num_draws_to_consider is None or num_draws_to_consider <= 0:
+        df_filtered = df
+    else:
+        df_filtered = df.tail(num_draws_to_consider)
+
+    last_seen_concurso_index = {}
+    for number in range(1, 26):
+        last_seen_concurso_index[number] = -len(df_filtered)
+
+    for i, row in df_filtered.iterrows():
+        relative_index = df_filtered.index.get_loc(i)
+        for col in dezenas_cols:
+            num = row[col]
+            last_seen_concurso_index[num] = relative_index
+
+    max_relative_index_filtered = len(df_filtered) - 1
+    overdue_counts = {}
+    for number in range(1, 26):
+        overdue_counts[number] = max_relative_index_filtered - last_seen_concurso_index[number]
+    return overdue_counts
+
+
+def _original_repeated_numbers(df, dezenas_cols):
+    repeated_counts_list = []
+    if len(df) < 2:
+        return pd.DataFrame(columns=['Concurso', 'Repetidos'])
+    for i in range(1, len(df)):
+        current_draw_numbers = set(df.iloc[i][dezenas_cols].values)
+        previous_draw_numbers = set(df.iloc[i-1][dezenas_cols].values)
+        repeated_count = len(current_draw_numbers.intersection(previous_draw_numbers))
+        repeated_counts_list.append({'Concurso': df.iloc[i]['Concurso'], 'Repetidos': repeated_count})
+    return pd.DataFrame(repeated_counts_list)
+
+
+def _original_even_odd(df, dezenas_cols):
+    even_odd_counts = {'pares': 0, 'ímpares': 0}
+    for col in dezenas_cols:
+        for num in df[col]:
+            if num % 2 == 0:
+                even_odd_counts['pares'] += 1
+            else:
+                even_odd_counts['ímpares'] += 1
+    return even_odd_counts
+
+
+def _original_prime_numbers(df, dezenas_cols):
+    prime_counts = {'primos': 0, 'não primos': 0}
+    for col in dezenas_cols:
+        for num in df[col]:
+            if core.is_prime(num):
+                prime_counts['primos'] += 1
+            else:
+                prime_counts['não primos'] += 1
+    return prime_counts
+
+
+def _original_sequences(df, dezenas_cols, length=3):
+    sequence_counts = Counter()
+    for index, row in df.iterrows():
+        numbers_in_draw = sorted([row[col] for col in dezenas_cols])
+        for i in range(len(numbers_in_draw) - length + 1):
+            sequence = tuple(numbers_in_draw[i:i+length])
+            is_consecutive = all(sequence[j] + 1 == sequence[j+1] for j in range(len(sequence)-1))
+            if is_consecutive:
+                sequence_counts[sequence] += 1
+    return sequence_counts
+
+
+# --- Fixtures ---
+
+@pytest.fixture(scope='module')
+def history():
+    return load_data()
+
+
+@pytest.fixture(scope='module', params=['csv', 0, 1, 2])
+def draws(request, history):
+    df, dezenas_cols = history
+    if request.param != 'csv':
+        df = df.iloc[:request.param].reset_index(drop=True)
+    # As implementações originais liam as dezenas como int, como o load_data antigo
+    original = df.astype({col: int for col in dezenas_cols + ['Concurso']})
+    return df, original, dezenas_cols
+
+
+def _records(frame):
+    return [{key: int(value) for key, value in record.items()} for record in frame.to_dict('records')]
+
+
+def _plain_sequences(counts):
+    return Counter({tuple(int(n) for n in sequence): count for sequence, count in counts.items()})
+
+
+# --- Parity ---
+
+@pytest.mark.parametrize('analyze, original', [
+    (core.analyze_even_odd_per_draw, _original_even_odd_per_draw),
+    (core.analyze_primes_per_draw, _original_primes_per_draw),
+    (core.analyze_repeated_numbers, _original_repeated_numbers),
+])
+def test_per_draw_analyses_match_original(draws, analyze, original):
+    df, original_df, dezenas_cols = draws
+    assert _records(analyze(df, dezenas_cols)) == _records(original(original_df, dezenas_cols))
+
+
+def test_number_frequency_matches_original(draws):
+    df, original_df, dezenas_cols = draws
+    expected = _original_number_frequency(original_df, dezenas_cols)
+    assert core.analyze_number_frequency(df, dezenas_cols) == expected
+    assert manus.analyze_number_frequency(df, dezenas_cols) == expected
+
+
+@pytest.mark.parametrize('num_draws', [None, 0, 1, 100])
+def test_overdue_numbers_match_original(draws, num_draws):
+    df, original_df, dezenas_cols = draws
+    assert (core.analyze_overdue_numbers(df, dezenas_cols, num_draws)
+            == _original_overdue_numbers(original_df, dezenas_cols, num_draws))
+
+
+def test_even_odd_and_primes_totals_match_original(draws):
+    df, original_df, dezenas_cols = draws
+    assert manus.analyze_even_odd(df, dezenas_cols) == _original_even_odd(original_df, dezenas_cols)
+    assert manus.analyze_prime_numbers(df, dezenas_cols) == _original_prime_numbers(original_df, dezenas_cols)
+
+
+@pytest.mark.parametrize('length', [2, 3, 4, 15])
+def test_sequences_match_original(draws, length):
+    df, original_df, dezenas_cols = draws
+    assert (_plain_sequences(manus.analyze_sequences(df, dezenas_cols, length))
+            == _plain_sequences(_original_sequences(original_df, dezenas_cols, length)))
+
+
+def test_store_input_and_row_selection_match_original(history):
+    df, dezenas_cols = history
+    store = core.as_store(df, dezenas_cols)
+    rows = np.arange(100, 400)
+    original_df = df.iloc[rows].reset_index(drop=True).astype({col: int for col in dezenas_cols})
+    assert (_records(core.analyze_even_odd_per_draw(store, dezenas_cols, rows=rows))
+            == _records(_original_even_odd_per_draw(original_df, dezenas_cols)))
+    assert (core.analyze_number_frequency(store, dezenas_cols, rows=rows)
+            == _original_number_frequency(original_df, dezenas_cols))
+    assert (core.analyze_overdue_numbers(store, dezenas_cols, rows=rows)
+            == _original_overdue_numbers(original_df, dezenas_cols))
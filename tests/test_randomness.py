@@ -0,0 +1,33 @@
+"""Per-number uniformity test of lotofacil_randomness."""
+
+import numpy as np
+import pytest
+
+from lotofacil_randomness import holm_adjust, number_uniformity, random_incidence
+from lotofacil_store import DrawStore, encode_draws
+
+
+def _store(incidence):
+    numbers = np.array([np.nonzero(row)[0] + 1 for row in incidence])
+    return DrawStore(np.arange(1, len(numbers) + 1), encode_draws(numbers))
+
+
+def test_holm_adjust_matches_step_down_definition():
+    p_values = np.array([0.01, 0.04, 0.03, 0.005])
+    # Ordenados: 0.005*4, 0.01*3, 0.03*2, 0.04*1 com máximo acumulado
+    np.testing.assert_allclose(holm_adjust(p_values), [0.03, 0.06, 0.06, 0.02])
+    assert (holm_adjust(np.array([0.5, 0.9])) <= 1).all()
+
+
+def test_single_deviating_number_is_flagged():
+    incidence = random_incidence(np.random.default_rng(0), 1, 2000)[0]
+    # Dezena 1 entra no lugar de outra em 25% dos sorteios em que estava ausente
+    rng = np.random.default_rng(1)
+    for row in np.nonzero(incidence[:, 0] == 0)[0]:
+        if rng.random() < 0.25:
+            incidence[row, 0] = 1
+            incidence[row, rng.choice(np.nonzero(incidence[row, 1:])[0]) + 1] = 0
+    result = number_uniformity(_store(incidence))
+    assert result.loc[1, 'Rejeita']
+    assert (result['PValorAjustado'] >= result['PValor']).all()
+    assert result['Esperada'].iloc[0] == pytest.approx(2000 * 15 / 25)
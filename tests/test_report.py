@@ -0,0 +1,42 @@
+"""Stage dependencies and cache invalidation of lotofacil_report."""
+
+import pytest
+
+from lotofacil_data import load_store
+from lotofacil_report import STAGES, run_report
+from lotofacil_store import PRIME_MASK, popcount
+
+PARAMS = {'modelo': {'inicial': 300, 'passo': 100}}
+
+
+@pytest.fixture(scope='module')
+def store():
+    return load_store()[:600]
+
+
+def _recomputed(report):
+    return {name for name, result in report['estagios'].items() if result['recalculado']}
+
+
+def test_requested_stage_pulls_in_its_dependencies(tmp_path, store):
+    report = run_report(store, str(tmp_path), ['destaques'], PARAMS, workers=1)
+    assert set(report['estagios']) == {'destaques', *STAGES['destaques'][1]}
+    highlights = report['estagios']['destaques']['resumo']
+    assert highlights['par_mais_frequente'] == {
+        'dezenas': report['estagios']['pares']['resumo']['top'][0][0],
+        'vezes': report['estagios']['pares']['resumo']['top'][0][1],
+    }
+
+
+def test_primes_stage_reads_frequency_counts(tmp_path, store):
+    report = run_report(store, str(tmp_path), ['primos'], workers=1)
+    assert report['estagios']['primos']['resumo']['primos'] == int(popcount(store.masks & PRIME_MASK).sum())
+
+
+def test_upstream_change_invalidates_only_downstream_stages(tmp_path, store):
+    run_report(store, str(tmp_path), ['destaques', 'primos'], PARAMS, workers=1)
+    report = run_report(store, str(tmp_path), ['destaques', 'primos'], PARAMS, workers=1)
+    assert _recomputed(report) == set()
+
+    report = run_report(store, str(tmp_path), ['destaques', 'primos'], {**PARAMS, 'pares': {'n': 5}}, workers=1)
+    assert _recomputed(report) == {'pares', 'destaques'}
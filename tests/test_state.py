@@ -0,0 +1,45 @@
+"""Persistence of AnalysisState through load_state."""
+
+import os
+
+import numpy as np
+import pytest
+
+from lotofacil_data import load_data
+from lotofacil_state import AnalysisState, load_state
+
+
+@pytest.fixture(scope='module')
+def history():
+    df, dezenas_cols = load_data()
+    return df.iloc[:200].reset_index(drop=True), dezenas_cols
+
+
+def _assert_full_pass(state, df, dezenas_cols):
+    expected = AnalysisState().ingest(df, dezenas_cols)
+    assert state.n_draws == len(df)
+    assert state.number_frequency() == expected.number_frequency()
+    assert state.overdue_numbers() == expected.overdue_numbers()
+    np.testing.assert_array_equal(state.pair_counts, expected.pair_counts)
+    np.testing.assert_array_equal(state.triple_counts, expected.triple_counts)
+
+
+def test_saved_state_resumes_from_new_rows(tmp_path, history):
+    df, dezenas_cols = history
+    path = str(tmp_path / 'state.npz')
+    load_state(df.iloc[:150], dezenas_cols, path)
+    _assert_full_pass(load_state(df, dezenas_cols, path), df, dezenas_cols)
+    assert os.listdir(tmp_path) == ['state.npz']
+
+
+@pytest.mark.parametrize('keep', [0, 0.5])
+def test_truncated_state_file_is_rebuilt(tmp_path, history, keep):
+    df, dezenas_cols = history
+    path = str(tmp_path / 'state.npz')
+    load_state(df, dezenas_cols, path)
+    with open(path, 'r+b') as f:
+        f.truncate(int(os.path.getsize(path) * keep))
+
+    _assert_full_pass(load_state(df, dezenas_cols, path), df, dezenas_cols)
+    # O arquivo reconstruído volta a ser legível
+    _assert_full_pass(AnalysisState.load(path), df, dezenas_cols)